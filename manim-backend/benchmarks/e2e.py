@@ -0,0 +1,243 @@
+"""Offline end-to-end benchmark of /explain-concept.
+
+Runs the real pipeline (validation, manim, TTS, ffmpeg, storage) with no API keys:
+Gemini is replaced by a stand-in that replays the valid scripts of benchmarks/corpus,
+and videos are published to a temporary directory through the local storage backend. Requests go
+through the ASGI app at a fixed concurrency and the report gives throughput,
+p50/p95/p99 latency and a per-stage breakdown from each response's timings.
+
+    python benchmarks/e2e.py [--requests N] [--concurrency C] [--save report.json]
+                             [--baseline report.json] [--tolerance 0.2]
+
+With --baseline the run fails when p95 latency or throughput is more than
+--tolerance worse than the saved report, so render-path regressions show up.
+Needs manim, ffmpeg and a pyttsx3 voice, like the service itself.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import types
+import asyncio
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+
+class ReplayModels:
+    """Answers generate_content from recorded corpus entries, with a fixed simulated latency"""
+
+    def __init__(self, corpus, latency):
+        self.corpus = corpus
+        self.latency = latency
+        self.calls = 0
+
+    def _entry(self, text):
+        for entry in self.corpus:
+            if entry["description"] in text:
+                return entry
+        raise KeyError(f"No corpus entry for: {text[:80]}")
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if isinstance(contents, list):
+            # Transcript request: [uploaded_file, prompt mentioning the description]
+            return types.SimpleNamespace(text=self._entry(contents[1])["transcript"])
+        entry = self._entry(contents)
+        return types.SimpleNamespace(text=json.dumps({
+            "python_code": entry["python_code"],
+            "explanation": entry["explanation"],
+            "narration": entry["narration"],
+            "sections": entry["sections"] or []
+        }))
+
+
+class ReplayFiles:
+    async def upload(self, file):
+        return types.SimpleNamespace(name=f"files/{os.path.basename(file)}")
+
+    async def get(self, name):
+        return types.SimpleNamespace(name=name, state="ACTIVE")
+
+    async def delete(self, name):
+        return None
+
+
+def load_corpus(corpus_dir):
+    """Corpus entries the validator accepts; the others would only measure repair attempts"""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.json"))):
+        with open(path) as f:
+            entry = json.load(f)
+        if entry.get("expected_valid", True):
+            corpus.append(entry)
+    return corpus
+
+
+def replay_client(corpus, latency):
+    models = ReplayModels(corpus, latency)
+    return types.SimpleNamespace(aio=types.SimpleNamespace(models=models, files=ReplayFiles()))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies, elapsed, results, failures):
+    stages = defaultdict(list)
+    critical = defaultdict(int)
+    for result in results:
+        timings = result.get("timings") or {}
+        for stage in timings.get("stages", []):
+            stages[stage["stage"]].append(stage["duration"])
+        for stage in timings.get("critical_path", []):
+            critical[stage] += 1
+    return {
+        "requests": len(latencies) + failures,
+        "failures": failures,
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies) if latencies else None
+        },
+        "stages": {
+            name: {
+                "count": len(durations),
+                "mean": statistics.mean(durations),
+                "p95": percentile(durations, 0.95),
+                "on_critical_path": critical[name]
+            }
+            for name, durations in sorted(stages.items())
+        }
+    }
+
+
+def print_report(report):
+    latency = report["latency"]
+    print(f"{report['requests']} requests, {report['failures']} failed, {report['elapsed']:.1f}s, "
+          f"{report['throughput']:.2f} req/s")
+    if latency["p50"] is not None:
+        print(f"latency p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  p99 {latency['p99']:.2f}s  "
+              f"max {latency['max']:.2f}s")
+    print(f"{'stage':<12}{'count':>7}{'mean':>9}{'p95':>9}{'critical':>10}")
+    for name, stage in report["stages"].items():
+        print(f"{name:<12}{stage['count']:>7}{stage['mean']:>8.2f}s{stage['p95']:>8.2f}s{stage['on_critical_path']:>10}")
+
+
+def compare(report, baseline, tolerance):
+    """Return the regressions of report against a saved baseline report"""
+    regressions = []
+    if baseline["latency"]["p95"] and report["latency"]["p95"] > baseline["latency"]["p95"] * (1 + tolerance):
+        regressions.append(f"p95 latency {report['latency']['p95']:.2f}s vs baseline {baseline['latency']['p95']:.2f}s")
+    if report["throughput"] < baseline["throughput"] * (1 - tolerance):
+        regressions.append(f"throughput {report['throughput']:.2f} req/s vs baseline {baseline['throughput']:.2f} req/s")
+    if report["failures"] > baseline["failures"]:
+        regressions.append(f"{report['failures']} failures vs baseline {baseline['failures']}")
+    return regressions
+
+
+async def run(args, work_dir):
+    import httpx
+    import index
+
+    corpus = load_corpus(args.corpus)
+    index.client = replay_client(corpus, args.gemini_latency)
+
+    latencies = []
+    results = []
+    failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(client, number):
+        nonlocal failures
+        entry = corpus[number % len(corpus)]
+        # A unique suffix keeps single-flight and the caches from folding requests together
+        description = entry["description"] if args.reuse else f"{entry['description']} (run {number})"
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/explain-concept", json={
+                "description": description,
+                "parallel_sections": args.parallel_sections
+            })
+            latency = time.perf_counter() - started
+        if response.status_code == 200:
+            latencies.append(latency)
+            results.append(response.json())
+        else:
+            failures += 1
+            print(f"Request {number} failed ({response.status_code}): {response.text[:300]}")
+
+    transport = httpx.ASGITransport(app=index.app)
+    async with index.lifespan(index.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for number in range(args.warmup):
+                await one(client, -1 - number)
+            latencies.clear()
+            results.clear()
+            failures = 0
+            started = time.perf_counter()
+            await asyncio.gather(*(one(client, number) for number in range(args.requests)))
+            elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed, results, failures)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1, help="requests run before measuring")
+    parser.add_argument("--corpus", default=os.path.join(BENCHMARK_DIR, "corpus"), help="directory of corpus entries")
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="simulated seconds per Gemini call")
+    parser.add_argument("--parallel-sections", action="store_true")
+    parser.add_argument("--reuse", action="store_true", help="repeat descriptions so caches and single-flight apply")
+    parser.add_argument("--save", help="write the report as JSON")
+    parser.add_argument("--baseline", help="fail on regressions against a saved report")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="rancho-bench-") as work_dir:
+        # Everything the service persists goes to the temporary directory; set before index is imported
+        os.environ.update({
+            "STORAGE_BACKEND": "local",
+            "LOCAL_STORAGE_PATH": os.path.join(work_dir, "published"),
+            "JOB_DB_PATH": os.path.join(work_dir, "jobs.db"),
+            "CODE_STORE_PATH": os.path.join(work_dir, "code_store.db"),
+            "RESULT_CACHE_BACKEND": "memory",
+            "HLS_DIR": os.path.join(work_dir, "hls"),
+            "WORKSPACE_DISK_ROOT": os.path.join(work_dir, "workspaces"),
+            "GLYPH_CACHE_DIR": os.path.join(work_dir, "glyph_cache"),
+            "TTS_CACHE_DIR": os.path.join(work_dir, "tts_cache")
+        })
+        report = asyncio.run(run(args, work_dir))
+
+    print_report(report)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Measure how much the shared glyph cache saves on formula-heavy renders.
+
+Renders a corpus of MathTex/Text scripts that reuse common formulas, each in its own
+fresh workspace like the service does: once with no cache, then again with a shared
+GlyphCache linked in before and published to after every render. Needs manim, LaTeX
+and dvisvgm.
+
+    python benchmarks/glyph_cache.py [--scripts N]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrency import run_command
+from glyph_cache import GlyphCache
+
+FORMULAS = [
+    r"a^2 + b^2 = c^2", r"e^{i\pi} + 1 = 0", r"\int_0^1 x^2 \, dx = \frac{1}{3}",
+    r"\sum_{n=1}^{\infty} \frac{1}{n^2} = \frac{\pi^2}{6}", r"F = ma", r"E = mc^2",
+    r"\frac{d}{dx} \sin x = \cos x", r"\nabla \cdot \mathbf{E} = \frac{\rho}{\varepsilon_0}",
+    r"x = \frac{-b \pm \sqrt{b^2 - 4ac}}{2a}", r"\lim_{h \to 0} \frac{f(x+h) - f(x)}{h}",
+    r"P(A \mid B) = \frac{P(B \mid A) P(A)}{P(B)}", r"\det(A - \lambda I) = 0"
+]
+LABELS = ["Theorem", "Proof", "Example", "Definition", "Result"]
+
+
+def make_corpus(count, seed=7):
+    rng = random.Random(seed)
+    scripts = []
+    for _ in range(count):
+        lines = ["from manim import *", "class ExplainConcept(Scene):", "    def construct(self):"]
+        lines.append(f"        self.add(Text({rng.choice(LABELS)!r}).to_edge(UP))")
+        for formula in rng.sample(FORMULAS, 4):
+            lines.append(f"        self.add(MathTex(r{formula!r}))")
+        lines.append("        self.wait(0.1)")
+        scripts.append("\n".join(lines) + "\n")
+    return scripts
+
+
+async def render(script, work_dir, cache=None):
+    script_path = os.path.join(work_dir, "concept_bench.py")
+    media_dir = os.path.join(work_dir, "media")
+    with open(script_path, "w") as f:
+        f.write(script)
+    if cache:
+        cache.link_into(media_dir)
+    started = time.perf_counter()
+    result = await run_command(
+        ["manim", "-ql", "--no_latex_cleanup", "--media_dir", media_dir, script_path, "ExplainConcept"],
+        cwd=work_dir
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f"manim failed: {result.stderr[-2000:]}")
+    if cache:
+        cache.publish(media_dir)
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scripts", type=int, default=12)
+    args = parser.parse_args()
+    corpus = make_corpus(args.scripts)
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = GlyphCache(os.path.join(root, "cache"), max_bytes=256 * 1024 * 1024, min_age=3600)
+        results = {}
+        for label, use_cache in (("no cache", None), ("shared cache", cache)):
+            elapsed = []
+            for script in corpus:
+                with tempfile.TemporaryDirectory(dir=root) as work_dir:
+                    elapsed.append(await render(script, work_dir, use_cache))
+            results[label] = sum(elapsed)
+            print(f"{label:>12}: {sum(elapsed):.1f}s total, {sum(elapsed) / len(elapsed):.2f}s per script")
+        stats = cache.stats()
+
+    print(f"Tex hit rate {stats['tex_hit_rate']:.0%} ({stats['tex_hits']} hits, {stats['tex_misses']} misses), "
+          f"{stats['entries']} cached SVGs, {stats['bytes'] / 1024:.0f} KiB")
+    print(f"Speedup: {results['no cache'] / results['shared cache']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
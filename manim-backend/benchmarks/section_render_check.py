@@ -0,0 +1,103 @@
+"""Check a parallel section render against a serial render of the same script.
+
+Compares frame count and duration of both outputs and reports wall-clock times.
+
+    python benchmarks/section_render_check.py [script.py] [--quality -ql]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrency import run_command
+from section_render import QUALITY_DIRS, count_segments, render_sections_parallel
+
+SECTIONED_SCENE = """from manim import *
+
+
+class ExplainConcept(Scene):
+    def construct(self):
+        self.next_section("Shapes")
+        circle = Circle(color=BLUE)
+        self.play(Create(circle))
+        self.wait(1)
+        self.next_section("Transform")
+        square = Square(color=GREEN)
+        self.play(Transform(circle, square))
+        self.wait(1)
+        self.next_section("Text")
+        label = Text("Sections render in parallel", font_size=32).next_to(circle, DOWN)
+        self.play(Write(label))
+        self.wait(1)
+        self.next_section("Outro")
+        self.play(FadeOut(circle), FadeOut(label))
+        self.wait(1)
+"""
+
+
+async def probe(video_path):
+    result = await run_command([
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-count_frames",
+        "-show_entries", "stream=nb_read_frames:format=duration", "-of", "json", video_path
+    ])
+    data = json.loads(result.stdout)
+    return int(data["streams"][0]["nb_read_frames"]), float(data["format"]["duration"])
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("script", nargs="?")
+    parser.add_argument("--quality", default="-ql")
+    args = parser.parse_args()
+
+    code = open(args.script).read() if args.script else SECTIONED_SCENE
+    segments = count_segments(code)
+    if segments < 2:
+        print("Script has fewer than two next_section() segments, nothing to compare")
+        return 1
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        media_dir = os.path.join(work_dir, "media")
+
+        async def render(path):
+            return await run_command(["manim", args.quality, "--media_dir", media_dir, path, "ExplainConcept"], cwd=work_dir)
+
+        serial_script = os.path.join(work_dir, "serial.py")
+        with open(serial_script, "w") as f:
+            f.write(code)
+        started = time.perf_counter()
+        result = await render(serial_script)
+        serial_time = time.perf_counter() - started
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            return 1
+
+        parallel_script = os.path.join(work_dir, "parallel.py")
+        with open(parallel_script, "w") as f:
+            f.write(code)
+        started = time.perf_counter()
+        result = await render_sections_parallel(code, parallel_script, media_dir, args.quality, render)
+        parallel_time = time.perf_counter() - started
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            return 1
+
+        quality_dir = QUALITY_DIRS[args.quality]
+        serial_frames, serial_duration = await probe(os.path.join(media_dir, "videos", "serial", quality_dir, "ExplainConcept.mp4"))
+        parallel_frames, parallel_duration = await probe(os.path.join(media_dir, "videos", "parallel", quality_dir, "ExplainConcept.mp4"))
+
+    print(f"Segments:  {segments}")
+    print(f"Serial:    {serial_frames} frames, {serial_duration:.3f}s, rendered in {serial_time:.2f}s")
+    print(f"Parallel:  {parallel_frames} frames, {parallel_duration:.3f}s, rendered in {parallel_time:.2f}s")
+    matches = serial_frames == parallel_frames and abs(serial_duration - parallel_duration) < 0.1
+    print("Outputs match" if matches else "MISMATCH between serial and parallel output")
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
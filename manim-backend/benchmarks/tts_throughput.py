@@ -0,0 +1,93 @@
+"""Measure TTS throughput in clips per second.
+
+Compares a fresh pyttsx3 engine per clip (the old behaviour) with the pooled TTS
+service on a cold cache and again on a warm cache. Clips are the sentences of the
+corpus transcripts.
+
+    python benchmarks/tts_throughput.py [--clips N]
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_service import TTSService, _pick_voice
+
+
+def load_clips(limit):
+    corpus_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+    clips = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.json"))):
+        with open(path) as f:
+            transcript = json.load(f).get("transcript") or ""
+        clips.extend(sentence for sentence in re.split(r"(?<=[.!?])\s+", transcript) if sentence.strip())
+    return clips[:limit]
+
+
+def synthesize_fresh_engine(text, audio_path):
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    engine.setProperty('rate', 140)
+    engine.setProperty('volume', 0.9)
+    voice_id = _pick_voice(engine)
+    if voice_id:
+        engine.setProperty('voice', voice_id)
+    engine.save_to_file(text, audio_path)
+    engine.runAndWait()
+    engine.stop()
+
+
+async def run_service(service, clips, work_dir, label):
+    started = time.perf_counter()
+    for index, text in enumerate(clips):
+        await service.synthesize(text, os.path.join(work_dir, f"{label}_{index}.wav"))
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clips", type=int, default=20)
+    args = parser.parse_args()
+
+    clips = load_clips(args.clips)
+    if not clips:
+        print("No transcripts found in the corpus")
+        return 1
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        started = time.perf_counter()
+        for index, text in enumerate(clips):
+            synthesize_fresh_engine(text, os.path.join(work_dir, f"fresh_{index}.wav"))
+        fresh_time = time.perf_counter() - started
+
+        service = TTSService(os.path.join(work_dir, "cache"), max_cache_bytes=500 * 1024 * 1024)
+        started = time.perf_counter()
+        await service.start()
+        startup_time = time.perf_counter() - started
+        cold_time = await run_service(service, clips, work_dir, "cold")
+        warm_time = await run_service(service, clips, work_dir, "warm")
+        stats = service.stats()
+        await service.close()
+
+    print(f"Clips: {len(clips)} (service startup, one-off: {startup_time:.2f}s)")
+    print(f"{'mode':28} {'time':>8} {'clips/s':>8}")
+    for label, elapsed in [
+        ("fresh engine per clip", fresh_time),
+        ("pooled worker, cold cache", cold_time),
+        ("pooled worker, warm cache", warm_time)
+    ]:
+        print(f"{label:28} {elapsed:7.2f}s {len(clips) / elapsed:8.1f}")
+    print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
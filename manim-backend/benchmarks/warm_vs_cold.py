@@ -0,0 +1,96 @@
+"""Compare cold `manim` CLI launches with renders on a warm, pre-imported worker.
+
+A trivial one-frame scene isolates startup cost; the corpus scripts show the
+effect on realistic renders.
+
+    python benchmarks/warm_vs_cold.py [--runs N] [--quality -ql]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrency import run_command
+from warm_renderer import WarmRenderer
+
+TRIVIAL_SCENE = """from manim import *
+
+
+class ExplainConcept(Scene):
+    def construct(self):
+        self.add(Dot())
+        self.wait(0.1)
+"""
+
+
+def load_scripts():
+    scripts = [("trivial", TRIVIAL_SCENE)]
+    corpus_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.json"))):
+        with open(path) as f:
+            entry = json.load(f)
+        if entry.get("expected_valid", True):
+            scripts.append((os.path.splitext(os.path.basename(path))[0], entry["python_code"]))
+    return scripts
+
+
+def write_script(work_dir, name, code, run):
+    script_path = os.path.join(work_dir, f"bench_{name}_{run}.py")
+    with open(script_path, "w") as f:
+        f.write(code)
+    return script_path
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--quality", default="-ql")
+    args = parser.parse_args()
+
+    renderer = WarmRenderer(size=1, max_jobs=10_000, max_rss_mb=1e9)
+    started = time.perf_counter()
+    await renderer.start()
+    print(f"Warm worker startup (one-off): {time.perf_counter() - started:.2f}s\n")
+
+    print(f"{'script':24} {'cold median':>12} {'warm median':>12} {'saved':>8}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        media_dir = os.path.join(work_dir, "media")
+        for name, code in load_scripts():
+            cold, warm = [], []
+            for run in range(args.runs):
+                script_path = write_script(work_dir, name, code, f"cold{run}")
+                started = time.perf_counter()
+                result = await run_command(
+                    ["manim", args.quality, "--media_dir", media_dir, script_path, "ExplainConcept"],
+                    cwd=work_dir
+                )
+                cold.append(time.perf_counter() - started)
+                if result.returncode != 0:
+                    print(f"{name}: cold render failed\n{result.stderr[-500:]}")
+                    break
+
+                script_path = write_script(work_dir, name, code, f"warm{run}")
+                started = time.perf_counter()
+                result = await renderer.render(script_path, media_dir, args.quality, work_dir)
+                warm.append(time.perf_counter() - started)
+                if result.returncode != 0:
+                    print(f"{name}: warm render failed\n{result.stderr[-500:]}")
+                    break
+
+            if cold and warm:
+                cold_median = statistics.median(cold)
+                warm_median = statistics.median(warm)
+                print(f"{name:24} {cold_median:11.2f}s {warm_median:11.2f}s {cold_median - warm_median:7.2f}s")
+
+    await renderer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
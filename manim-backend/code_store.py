@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+from result_cache import normalize_description
+
+logger = logging.getLogger(__name__)
+
+
+def description_hash(description):
+    return hashlib.sha256(normalize_description(description).encode("utf-8")).hexdigest()
+
+
+def code_hash(python_code):
+    return hashlib.sha256(python_code.encode("utf-8")).hexdigest()
+
+
+class CodeStore:
+    """Persists Manim scripts that rendered successfully so re-renders can skip the LLM"""
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scripts (
+                    code_hash TEXT PRIMARY KEY,
+                    description_hash TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    python_code TEXT NOT NULL,
+                    explanation TEXT NOT NULL,
+                    narration TEXT,
+                    narration_sections TEXT,
+                    duration REAL,
+                    frame_count INTEGER,
+                    render_time REAL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            # Stores created before narration was generated with the script lack these columns
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(scripts)")]
+            for column in ("narration", "narration_sections"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE scripts ADD COLUMN {column} TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS scripts_by_description ON scripts (description_hash, created_at)"
+            )
+        logger.info(f"Code store ready: {db_path}")
+
+    def save(self, description, python_code, explanation, narration=None, narration_sections=None,
+             duration=None, frame_count=None, render_time=None):
+        """Record a script that rendered successfully, along with its render metadata.
+
+        narration_sections is stored as JSON.
+        """
+        digest = code_hash(python_code)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO scripts
+                    (code_hash, description_hash, description, python_code, explanation,
+                     narration, narration_sections, duration, frame_count, render_time, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (digest, description_hash(description), description, python_code, explanation,
+                 narration, json.dumps(narration_sections) if narration_sections else None,
+                 duration, frame_count, render_time, time.time())
+            )
+        logger.info(f"Stored validated script {digest[:12]} for: {description}")
+        return digest
+
+    def _row_to_dict(self, row):
+        return dict(row) if row is not None else None
+
+    def lookup(self, description):
+        """Return the most recent validated script for a description, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM scripts WHERE description_hash = ? ORDER BY created_at DESC LIMIT 1",
+                (description_hash(description),)
+            ).fetchone()
+        return self._row_to_dict(row)
+
+    def get(self, digest):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM scripts WHERE code_hash = ?", (digest,)).fetchone()
+        return self._row_to_dict(row)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scripts").fetchone()[0]
@@ -0,0 +1,146 @@
+import os
+import re
+import codecs
+import signal
+import resource
+import asyncio
+import functools
+import contextvars
+import subprocess
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from metrics import subprocess_seconds
+
+logger = logging.getLogger(__name__)
+
+# Bounded pool for blocking SDK calls (Cloudinary uploads, file I/O) so they never run on the event loop
+blocking_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("BLOCKING_EXECUTOR_WORKERS", "4")),
+    thread_name_prefix="blocking"
+)
+
+
+# Processes started through run_command: overall, and by requests that track their spawns
+process_stats = {
+    "spawned": 0,
+    "requests": 0,
+    "spawned_by_requests": 0
+}
+
+_request_spawns = contextvars.ContextVar("request_spawns", default=None)
+
+
+def track_spawns():
+    """Count processes spawned by the current task and the tasks it creates; returns the counter"""
+    counter = {"spawned": 0}
+    _request_spawns.set(counter)
+    return counter
+
+
+def finish_tracking(counter):
+    process_stats["requests"] += 1
+    process_stats["spawned_by_requests"] += counter["spawned"]
+
+
+async def run_blocking(func, *args, executor=None, **kwargs):
+    """Run a blocking callable in a worker thread and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor or blocking_executor, functools.partial(func, *args, **kwargs))
+
+
+def rlimit_preexec(cpu_seconds=None, address_space_mb=None, file_size_mb=None):
+    """Build a preexec_fn that caps a child's CPU time, address space and output file size.
+
+    The kernel enforces these, so a runaway script dies with SIGXCPU/SIGKILL/SIGXFSZ
+    (or MemoryError) instead of pinning a core or filling the disk.
+    """
+    limits = []
+    if cpu_seconds:
+        limits.append((resource.RLIMIT_CPU, int(cpu_seconds)))
+    if address_space_mb:
+        limits.append((resource.RLIMIT_AS, int(address_space_mb * 1024 * 1024)))
+    if file_size_mb:
+        limits.append((resource.RLIMIT_FSIZE, int(file_size_mb * 1024 * 1024)))
+
+    def apply_limits():
+        for limit, value in limits:
+            resource.setrlimit(limit, (value, value))
+
+    return apply_limits if limits else None
+
+
+def kill_process_group(process):
+    """Kill a child started in its own session together with everything it spawned"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _read_lines(stream, on_output):
+    """Collect a pipe while passing each line to on_output as it arrives.
+
+    Lines end at \r as well as \n, since progress bars redraw themselves with \r.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = []
+    pending = ""
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        *lines, pending = re.split(r"[\r\n]", pending + decoder.decode(chunk))
+        for line in lines:
+            if line:
+                on_output(line)
+    if pending:
+        on_output(pending)
+    return b"".join(chunks)
+
+
+async def _communicate_streaming(process, on_output):
+    stdout, stderr = await asyncio.gather(
+        _read_lines(process.stdout, on_output),
+        _read_lines(process.stderr, on_output)
+    )
+    await process.wait()
+    return stdout, stderr
+
+
+async def run_command(command, cwd=None, timeout=None, on_output=None, preexec_fn=None):
+    """Run a subprocess without blocking the event loop.
+
+    Returns a subprocess.CompletedProcess with decoded stdout/stderr so call sites
+    read the same as they did with subprocess.run(capture_output=True, text=True).
+    If on_output is given it is called with every output line while the process runs.
+    The child runs in its own process group, which is killed as a whole on timeout or
+    cancellation.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        start_new_session=True,
+        preexec_fn=preexec_fn
+    )
+    process_stats["spawned"] += 1
+    counter = _request_spawns.get()
+    if counter is not None:
+        counter["spawned"] += 1
+    try:
+        with subprocess_seconds.time(command=os.path.basename(command[0])):
+            communicate = process.communicate() if on_output is None else _communicate_streaming(process, on_output)
+            stdout, stderr = await asyncio.wait_for(communicate, timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        if process.returncode is None:
+            kill_process_group(process)
+            await process.wait()
+        raise
+    return subprocess.CompletedProcess(
+        command,
+        process.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace")
+    )
@@ -0,0 +1,142 @@
+import os
+import time
+import fcntl
+import shutil
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Subdirectories of a manim media dir holding content-addressed SVGs: "<hash>.svg"
+GLYPH_DIRS = ("Tex", "texts")
+
+
+class GlyphCache:
+    """Keeps the LaTeX and Pango text SVGs manim generates, shared by every render.
+
+    Manim names these files after a hash of their content and skips generation when the
+    SVG already exists, so the cache is linked into a render's media dir beforehand and
+    new SVGs are published back afterwards. Publishing copies to a temp name and renames,
+    and the cache is flock'ed so concurrent workers never see partial files or evict
+    under each other.
+    """
+
+    def __init__(self, root, max_bytes, min_age):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Entries used this recently are never evicted: a running render may hold a link to them
+        self.min_age = min_age
+        self.tex_hits = 0
+        self.tex_misses = 0
+        self.text_generated = 0
+        self.published = 0
+        self.evictions = 0
+        for name in GLYPH_DIRS:
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    @contextmanager
+    def _locked(self, mode):
+        with open(os.path.join(self.root, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def link_into(self, media_dir):
+        """Symlink every cached SVG into media_dir so manim finds it; returns the number linked"""
+        linked = 0
+        with self._locked(fcntl.LOCK_SH):
+            for name in GLYPH_DIRS:
+                cache_dir = os.path.join(self.root, name)
+                target_dir = os.path.join(media_dir, name)
+                os.makedirs(target_dir, exist_ok=True)
+                for entry in os.scandir(cache_dir):
+                    if not entry.name.endswith(".svg"):
+                        continue
+                    try:
+                        os.symlink(entry.path, os.path.join(target_dir, entry.name))
+                        linked += 1
+                    except FileExistsError:
+                        pass
+        return linked
+
+    def publish(self, media_dir):
+        """Copy SVGs a render generated into the cache and record hits; returns the number published.
+
+        Needs manim's no_latex_cleanup so every formula the render used leaves its .tex
+        file behind next to the SVG.
+        """
+        published = 0
+        now = time.time()
+        with self._locked(fcntl.LOCK_EX):
+            for name in GLYPH_DIRS:
+                source_dir = os.path.join(media_dir, name)
+                if not os.path.isdir(source_dir):
+                    continue
+                for entry in os.scandir(source_dir):
+                    if not entry.name.endswith(".svg"):
+                        continue
+                    used = name != "Tex" or os.path.exists(os.path.join(source_dir, entry.name[:-4] + ".tex"))
+                    if entry.is_symlink():
+                        if name == "Tex" and used:
+                            self.tex_hits += 1
+                            try:
+                                os.utime(os.readlink(entry.path), (now, now))
+                            except OSError:
+                                pass
+                        continue
+                    if name == "Tex":
+                        self.tex_misses += 1
+                    else:
+                        self.text_generated += 1
+                    cache_path = os.path.join(self.root, name, entry.name)
+                    partial_path = f"{cache_path}.{os.getpid()}.part"
+                    shutil.copyfile(entry.path, partial_path)
+                    os.replace(partial_path, cache_path)
+                    published += 1
+            self.published += published
+            self._evict(now)
+        return published
+
+    def _entries(self):
+        entries = []
+        for name in GLYPH_DIRS:
+            for entry in os.scandir(os.path.join(self.root, name)):
+                if entry.name.endswith(".svg"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self, now):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for modified, size, path in sorted(entries):
+            if total <= self.max_bytes or now - modified < self.min_age:
+                break
+            os.remove(path)
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.tex_hits + self.tex_misses
+        return {
+            "tex_hits": self.tex_hits,
+            "tex_misses": self.tex_misses,
+            "tex_hit_rate": self.tex_hits / lookups if lookups else None,
+            "text_generated": self.text_generated,
+            "published": self.published,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries)
+        }
+
+
+def create_glyph_cache():
+    """Build the shared glyph cache from GLYPH_CACHE_* settings"""
+    return GlyphCache(
+        os.environ.get("GLYPH_CACHE_DIR", os.path.join(os.path.expanduser("~"), "manim_temp", "glyph_cache")),
+        max_bytes=int(os.environ.get("GLYPH_CACHE_MAX_MB", "256")) * 1024 * 1024,
+        min_age=float(os.environ.get("GLYPH_CACHE_MIN_AGE_SECONDS", "3600"))
+    )
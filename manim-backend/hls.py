@@ -0,0 +1,100 @@
+import os
+import math
+import shutil
+import logging
+from concurrency import run_command
+from media import probe_media, MEDIA_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_NAME = "index.m3u8"
+
+
+class HLSStream:
+    """An HLS EVENT playlist that grows as rendered sections finish.
+
+    Sections may finish in any order; a section is only listed once every section
+    before it is listed, so the playlist always plays from the start without gaps.
+    """
+
+    def __init__(self, directory, target_duration=20):
+        self.directory = directory
+        self.target_duration = target_duration
+        self._finished = {}
+        self._next_index = 0
+        self._listed = []
+        self._ended = False
+
+    def start(self):
+        """Reset the stream directory and publish an empty playlist players can start polling"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self._finished = {}
+        self._next_index = 0
+        self._listed = []
+        self._ended = False
+        self._write_playlist()
+
+    async def add_section(self, index, video_path):
+        """Package one rendered section as a transport stream segment and publish what is contiguous.
+
+        video_path may be None for a section that produced no frames. Failures are logged and
+        leave a gap-free playlist that simply stops growing.
+        """
+        segment = None
+        if video_path:
+            try:
+                segment = await self._package(index, video_path)
+            except Exception as e:
+                logger.error(f"Could not package section {index} for HLS: {e}")
+                return
+        self._finished[index] = segment
+        while self._next_index in self._finished:
+            segment = self._finished.pop(self._next_index)
+            if segment:
+                self._listed.append(segment)
+            self._next_index += 1
+        self._write_playlist()
+
+    async def _package(self, index, video_path):
+        segment_name = f"section_{index:03d}.ts"
+        # Sections are H.264 in MP4; remuxing to MPEG-TS needs no re-encode
+        result = await run_command([
+            "ffmpeg", "-v", "error", "-i", video_path, "-c", "copy",
+            "-bsf:v", "h264_mp4toannexb", "-f", "mpegts", "-y",
+            os.path.join(self.directory, segment_name)
+        ], timeout=MEDIA_TIMEOUT)
+        if result.returncode != 0:
+            raise Exception(result.stderr)
+        duration = (await probe_media(video_path))["duration"] or 0.0
+        return {"name": segment_name, "duration": duration}
+
+    def finish(self):
+        """Mark the playlist complete so players stop polling for new segments"""
+        self._ended = True
+        self._write_playlist()
+
+    def _write_playlist(self):
+        longest = max([segment["duration"] for segment in self._listed] or [0])
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{max(self.target_duration, math.ceil(longest))}",
+            "#EXT-X-MEDIA-SEQUENCE:0"
+        ]
+        for position, segment in enumerate(self._listed):
+            # Every section starts its timestamps at zero
+            if position > 0:
+                lines.append("#EXT-X-DISCONTINUITY")
+            lines.append(f"#EXTINF:{segment['duration']:.3f},")
+            lines.append(segment["name"])
+        if self._ended:
+            lines.append("#EXT-X-ENDLIST")
+
+        playlist_path = os.path.join(self.directory, PLAYLIST_NAME)
+        partial_path = f"{playlist_path}.part"
+        with open(partial_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        # Players polling the playlist never see a half-written file
+        os.replace(partial_path, playlist_path)
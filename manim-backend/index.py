@@ -1,9 +1,11 @@
-from typing import Union
-from fastapi import FastAPI, HTTPException, Body
+from typing import Union, Literal
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Body, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from fastapi.staticfiles import StaticFiles
 from google import genai
 from google.genai import types
 import os
-import subprocess
 import tempfile
 import cloudinary
 import cloudinary.uploader
@@ -13,10 +15,31 @@ import json
 import dotenv
 import glob
 import time
-import re
 import shutil
-import pyttsx3
 import logging
+import asyncio
+import subprocess
+from jobs import JobStore, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED
+from concurrency import run_blocking, run_command, rlimit_preexec, track_spawns, finish_tracking, process_stats
+from render_pool import create_render_pool, RenderPoolFull
+from result_cache import create_result_cache, cache_key
+from singleflight import SingleFlight
+from code_store import CodeStore
+from validator import validate_manim_code, load_manim_namespace, validation_stats, CodeValidationError
+from retry_policy import create_retry_policy, trim_traceback, AttemptStats, STRATEGY_REPAIR
+from warm_renderer import create_warm_renderer
+from section_render import QUALITY_DIRS, count_segments, render_sections_parallel, segment_artifacts
+from pipeline import StageTimings
+from tts_service import create_tts_service
+from storage import create_storage, LocalStorage
+from hls import HLSStream, PLAYLIST_NAME
+from progress import ProgressBus, ManimProgress
+from narration_audio import load_section_timings, wav_duration, place_section_clips
+from media import probe_media, build_mux_command, MEDIA_TIMEOUT
+from workspace import create_workspace_manager, directory_size
+from glyph_cache import create_glyph_cache
+from quality import create_quality_policy, QUALITY_TIERS
+from metrics import registry, stage_seconds, gemini_seconds, gemini_file_active_seconds, attempts_total, failures_total
 
 # Configure logging
 logging.basicConfig(
@@ -31,10 +54,76 @@ logger = logging.getLogger(__name__)
 
 dotenv.load_dotenv()
 
-app = FastAPI()
+# Persistent job store for the asynchronous /jobs API
+job_store = JobStore(os.environ.get(
+    "JOB_DB_PATH",
+    os.path.join(os.path.expanduser("~"), "manim_temp", "jobs.db")
+))
+
+# Caps concurrent Manim renders and bounds the wait queue
+render_pool = create_render_pool()
+
+# Optional pool of pre-imported Manim processes (RENDER_BACKEND=warm)
+warm_renderer = create_warm_renderer(render_pool.workers)
+
+# Stage, render and upload progress per render, streamed to clients over SSE
+progress_bus = ProgressBus()
+
+# Long-lived pyttsx3 worker with a cache of synthesized clips
+tts_service = create_tts_service()
+
+# Finished results keyed on the normalized description and render settings
+result_cache = create_result_cache()
+
+# Scripts that rendered successfully, reused for re-renders without an LLM call
+code_store = CodeStore(os.environ.get(
+    "CODE_STORE_PATH",
+    os.path.join(os.path.expanduser("~"), "manim_temp", "code_store.db")
+))
+
+# Attempt/backoff policy and per-strategy success rates for render retries
+retry_policy = create_retry_policy()
+attempt_stats = AttemptStats()
+
+# Identical concurrent requests share one in-flight render
+render_flights = SingleFlight()
+
+# Keep references to running job tasks so they are not garbage collected
+running_jobs = {}
+
+@asynccontextmanager
+async def lifespan(app):
+    # Import manim once up front so the first validation does not stall a request
+    await run_blocking(load_manim_namespace)
+    if warm_renderer:
+        await warm_renderer.start()
+    try:
+        await tts_service.start()
+    except Exception as e:
+        # Videos still render without narration; synthesize() retries starting the worker
+        logger.error(f"TTS worker unavailable at startup: {e}")
+    sweeper = asyncio.create_task(workspaces.run_sweeper(WORKSPACE_SWEEP_INTERVAL))
+    # Resume jobs that were interrupted by a restart so polling clients still get a result
+    for job in job_store.unfinished():
+        logger.info(f"Resuming interrupted job: {job['job_id']}")
+        start_job(job["job_id"], ConceptRequest(**job["request"]))
+    yield
+    sweeper.cancel()
+    if warm_renderer:
+        await warm_renderer.close()
+    await tts_service.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Gemini client, created on first use so the app imports without an API key;
+# offline benchmarks assign their own stand-in to `client`
+client = None
 
-# Initialize Gemini client
-client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+def gemini():
+    global client
+    if client is None:
+        client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    return client
 
 # Initialize Cloudinary
 cloudinary.config(
@@ -43,8 +132,64 @@ cloudinary.config(
     api_secret=os.environ.get("CLOUDINARY_API_SECRET")
 )
 
+# Where finished videos are published (STORAGE_BACKEND=cloudinary or local)
+storage = create_storage()
+if isinstance(storage, LocalStorage):
+    app.mount(storage.url_prefix, StaticFiles(directory=storage.root), name="videos")
+
+# Progressive HLS playlists, served straight from disk
+HLS_DIR = os.environ.get("HLS_DIR", os.path.join(os.path.expanduser("~"), "manim_temp", "hls"))
+os.makedirs(HLS_DIR, exist_ok=True)
+app.mount("/hls", StaticFiles(directory=HLS_DIR), name="hls")
+
+# Every render gets its own scratch directory (tmpfs when it has room); a background
+# sweeper removes workspaces left by crashed processes and expires old HLS streams
+workspaces = create_workspace_manager()
+workspaces.add_sweep_target(
+    HLS_DIR,
+    max_age=float(os.environ.get("HLS_MAX_AGE_SECONDS", "21600")),
+    max_bytes=int(os.environ.get("HLS_MAX_MB", "2048")) * 1024 * 1024
+)
+WORKSPACE_SWEEP_INTERVAL = float(os.environ.get("WORKSPACE_SWEEP_INTERVAL_SECONDS", "60"))
+
+# LaTeX and text SVGs outlive the workspaces so the same formula is only typeset once
+glyph_cache = create_glyph_cache()
+
 class ConceptRequest(BaseModel):
     description: str
+    # Opt-in: render next_section() segments in parallel processes and concatenate them
+    parallel_sections: bool = False
+    # Opt-in: publish sections as an HLS playlist while they render (implies parallel sections)
+    progressive: bool = False
+    # Render tier; may be lowered when the render queue is deep
+    quality: Literal["low", "medium", "high"] = "medium"
+    # Opt-in: return a fast low-quality render first and upgrade to `quality` in the background
+    preview: bool = False
+
+# Where the narration text comes from: "script" (generated with the Manim code) or "video" (Gemini watches the render)
+NARRATION_SOURCE = os.environ.get("NARRATION_SOURCE", "script").lower()
+
+# Settings that change the rendered output; part of the result cache key
+RENDER_SETTINGS = {
+    "model": "gemini-2.0-flash",
+    "quality": "-qm",
+    "narration": f"pyttsx3-{NARRATION_SOURCE}-sections"
+}
+
+# Hard limits for every manim render; the kernel kills a script that exceeds them (0 disables a limit)
+RENDER_LIMITS = {
+    "cpu_seconds": int(os.environ.get("RENDER_CPU_SECONDS", "900")),
+    "address_space_mb": int(os.environ.get("RENDER_MEMORY_MB", "8192")),
+    "file_size_mb": int(os.environ.get("RENDER_FILE_SIZE_MB", "2048"))
+}
+RENDER_TIMEOUT = float(os.environ.get("RENDER_TIMEOUT_SECONDS", "600"))
+render_preexec = rlimit_preexec(**RENDER_LIMITS)
+
+# Which tier a render runs at, and background upgrades of previews (referenced so they are not garbage collected)
+quality_policy = create_quality_policy()
+upgrade_tasks = set()
+# Jobs whose preview is done and whose upgrade render is still running in this process
+upgrading_jobs = set()
 
 def log_directory_contents(directory, description=""):
     """Log all files and directories in the given path"""
@@ -65,128 +210,362 @@ def log_directory_contents(directory, description=""):
     except Exception as e:
         logger.error(f"Error logging directory contents for {directory}: {e}")
 
-def wait_for_file_stability(file_path, max_wait=30, check_interval=1):
-    """Wait for a file to be completely written (size stops changing)"""
-    logger.info(f"Waiting for file stability: {file_path}")
-    
-    if not os.path.exists(file_path):
-        logger.error(f"File does not exist: {file_path}")
-        return False
-    
-    previous_size = -1
-    stable_count = 0
-    wait_time = 0
-    
-    while wait_time < max_wait:
-        try:
-            current_size = os.path.getsize(file_path)
-            logger.info(f"File size check: {current_size} bytes (previous: {previous_size})")
-            
-            if current_size == previous_size and current_size > 0:
-                stable_count += 1
-                if stable_count >= 3:  # File size stable for 3 consecutive checks
-                    logger.info(f"File is stable at {current_size} bytes")
-                    return True
-            else:
-                stable_count = 0
-            
-            previous_size = current_size
-            time.sleep(check_interval)
-            wait_time += check_interval
-            
-        except Exception as e:
-            logger.error(f"Error checking file stability: {e}")
-            time.sleep(check_interval)
-            wait_time += check_interval
-    
-    logger.warning(f"File did not stabilize within {max_wait} seconds")
-    return False
+# Enhanced prompt with stricter requirements and better guidance
+CODE_GENERATION_PROMPT = """
+        Generate Manim code to create a detailed, educational animation explaining the concepts requested.
+        Use your creativity and artistic flair to make the animation visually appealing and engaging. At the same time
+        the concepts should be clear and easy to understand. The animation should be suitable for educational purposes.
+
+        STRICT REQUIREMENTS:
+        1. The code MUST be complete, runnable, and error-free
+        2. Use appropriate Manim constructs (MathTex, Text, etc.) with proper syntax
+        3. Include step-by-step visual transitions that build understanding
+        4. ALL elements MUST stay within the frame at all times
+        5. Use a consistent, visually appealing color scheme with good contrast
+        6. Text must be readable (appropriate size and duration on screen)
+        7. Include at least 3-4 distinct scenes or concepts to ensure depth
+        8. Add meaningful labels and annotations to clarify concepts
+        9. The class name MUST be "ExplainConcept" and inherit from Scene
+        10. IMPORTANT: Add proper timing with self.wait() commands between animations
+        11. Each scene should display for at least 2-3 seconds using self.wait(2) or self.wait(3)
+        12. End with self.wait(2) to ensure complete rendering
+        13. DO NOT use any Unicode characters, emojis, or special symbols in the code
+        14. Use only ASCII characters and standard English text
+        15. Replace any symbols with descriptive text (e.g., "lock" instead of 🔒)
+        16. Start each distinct scene with self.next_section("short name") directly inside construct()
+        
+        The animation should be 40-60 seconds in length with smooth transitions.
+        
+        For the explanation:
+        - Provide a concise but detailed explanation (150-250 words)
+        - Highlight 3-5 key points illustrated in the visualization
+        - Explain the educational value of specific visual elements
+        - Use clear, direct language without unnecessary jargon
+        
+        For the narration:
+        - Write the voice-over a narrator reads while the animation plays, following it from start to finish
+        - About 100-150 words so it fits the 40-60 second animation
+        - Plain spoken sentences only: no timestamps, stage directions, markdown or code
+        - Also split the narration into "sections": one entry per self.next_section() in the code, in the
+          same order, with "name" set to the exact section name and "narration" to what is said during it
+        
+        DO NOT REFERENCE ANY EXTERNAL SVG OR IMAGE FILES.
+        DO NOT USE UNICODE CHARACTERS OR EMOJIS IN THE CODE.
+        Return only the Python code without any explanations or markdown.
+        Also provide a brief explanation of the visualization. Address the animation as visualization in explanation.
+"""
+
+REPAIR_PROMPT = """
+        The Manim script below was generated for an educational animation but failed to render.
+        Fix ONLY what causes the error, with the smallest possible change to the script.
+        Keep the class name "ExplainConcept", the scene structure, the timing and the visual design unchanged.
+        All the original requirements still apply: ASCII only, no external SVG or image files,
+        every element within the frame.
+
+        Return the complete fixed Python code, plus the explanation, the narration and the per-section
+        narration (all unchanged unless the fix changes what is shown).
+"""
+
+CODE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "python_code": {
+            "type": "string"
+        },
+        "explanation": {
+            "type": "string"
+        },
+        "narration": {
+            "type": "string"
+        },
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string"
+                    },
+                    "narration": {
+                        "type": "string"
+                    }
+                },
+                "required": ["name", "narration"]
+            }
+        }
+    },
+    "required": ["python_code", "explanation", "narration"]
+}
+
+class ManimRenderError(Exception):
+    """Manim ran but did not produce a video; carries its error output for repair prompts"""
+
+    def __init__(self, message, stderr=""):
+        super().__init__(message)
+        self.stderr = stderr
+
+async def generate_manim_code(description):
+    """Ask Gemini for a Manim script and explanation for the concept"""
+    logger.info("Generating code with Gemini...")
+    with gemini_seconds.time(call="generate"):
+        response = await gemini().aio.models.generate_content(
+            model=RENDER_SETTINGS["model"], contents=description, config={
+                'system_instruction': CODE_GENERATION_PROMPT,
+                'response_mime_type': 'application/json',
+                'response_schema': CODE_RESPONSE_SCHEMA
+            }
+        )
+
+    json_response = json.loads(response.text)
+    logger.info("Code generated successfully")
+    return (
+        json_response["python_code"], json_response["explanation"],
+        json_response.get("narration"), json_response.get("sections") or None
+    )
+
+async def repair_manim_code(description, python_code, narration, narration_sections, error_output):
+    """Send the failing script and its trimmed traceback back to Gemini for a minimal fix"""
+    logger.info("Requesting targeted repair from Gemini...")
+    contents = (
+        f"Concept: {description}\n\n"
+        f"Failing script:\n```python\n{python_code}\n```\n\n"
+        f"Narration:\n{narration or ''}\n\n"
+        f"Section narration:\n{json.dumps(narration_sections or [])}\n\n"
+        f"Error:\n{error_output}"
+    )
+    with gemini_seconds.time(call="repair"):
+        response = await gemini().aio.models.generate_content(
+            model=RENDER_SETTINGS["model"], contents=contents, config={
+                'system_instruction': REPAIR_PROMPT,
+                'response_mime_type': 'application/json',
+                'response_schema': CODE_RESPONSE_SCHEMA
+            }
+        )
+
+    json_response = json.loads(response.text)
+    logger.info("Repaired code generated successfully")
+    return (
+        json_response["python_code"], json_response["explanation"],
+        json_response.get("narration") or narration, json_response.get("sections") or narration_sections
+    )
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 @app.post("/explain-concept")
-async def explain_concept(request: ConceptRequest):
-    max_attempts = 3
+async def explain_concept(request: ConceptRequest, http_request: Request):
+    # Render in a task so a client that hangs up cancels it and frees its render slot
+    task = asyncio.create_task(generate_concept_video(request))
+    while not task.done():
+        await asyncio.wait({task}, timeout=1)
+        if not task.done() and await http_request.is_disconnected():
+            logger.info(f"Client disconnected, cancelling render: {request.description}")
+            task.cancel()
+            await asyncio.wait({task})
+            raise HTTPException(status_code=499, detail="Client closed request")
+    return task.result()
+
+async def generate_concept_video(request: ConceptRequest, request_id=None, on_upgrade=None, on_channel=None,
+                                 ticket=None):
+    """Serve from the result cache, or admit the request into the render pool and run the pipeline.
+
+    A preview request gets a low tier render first; the requested tier is rendered in the
+    background and on_upgrade(fields) is called with the result fields that change.
+    on_channel(channel) is called with the progress channel once the tier is chosen.
+    ticket is an admission ticket reserved in advance; it is handed back unless this
+    request starts the render.
+    """
+    cached = result_cache.get(render_key(request, request.quality))
+    if cached:
+        logger.info(f"Result cache hit for: {request.description}")
+        return {**cached, "attempts": 0, "cached": True, "quality": request.quality, "playlist_url": None}
+
+    tier = quality_policy.choose(request.quality, render_pool.backlog())
+    if request.preview and tier != "low":
+        quality_policy.previews += 1
+        tier = "low"
+    key = render_key(request, tier)
+    flight = flight_key(request, tier)
+    channel = stream_id(flight)
+    if on_channel:
+        on_channel(channel)
+    # The requested tier was looked up above; only a lowered tier can still be cached
+    cached = result_cache.get(key) if tier != request.quality else None
+    if cached or render_flights.has(flight):
+        # Neither a cache hit nor joining a running render needs a place of its own
+        if ticket:
+            ticket.release()
+    if cached:
+        result = {**cached, "attempts": 0, "cached": True, "playlist_url": None}
+    else:
+        result = await render_flights.do(
+            flight, lambda: admit_and_render(request, request_id, key, tier, channel, ticket)
+        )
+    result = {**result, "quality": tier}
+
+    if request.preview and tier != request.quality:
+        result["upgrade"] = "pending"
+        task = asyncio.create_task(upgrade_render(request, result["video_url"], channel, on_upgrade))
+        upgrade_tasks.add(task)
+        task.add_done_callback(upgrade_tasks.discard)
+    return result
+
+async def admit_and_render(request: ConceptRequest, request_id, key, tier, channel, ticket=None):
+    request_id = request_id or str(uuid.uuid4())
+    try:
+        async with render_pool.admission(ticket), workspaces.workspace(request_id) as work_dir:
+            result = await render_concept(request, request_id, work_dir, tier, channel)
+    except RenderPoolFull as e:
+        raise overloaded_error(e)
+
+    result_cache.set(key, result["video_url"], result["explanation"])
+    return result
+
+async def upgrade_render(request: ConceptRequest, preview_url, channel, on_upgrade=None):
+    """Render a previewed concept at its requested tier, reusing the script from the code store.
+
+    Skipped while the queue is deep enough to degrade it; asking again later renders it.
+    Once done the result cache serves the upgraded video for this concept and the outcome
+    is published on the preview's channel.
+    """
+    tier = request.quality
+    if quality_policy.choose(tier, render_pool.backlog()) != tier:
+        fields = {"upgrade": "skipped"}
+    else:
+        key = render_key(request, tier)
+        try:
+            upgrade_request = request.model_copy(update={"progressive": False, "preview": False})
+            flight = flight_key(upgrade_request, tier)
+            upgraded = await render_flights.do(
+                flight, lambda: admit_and_render(upgrade_request, None, key, tier, stream_id(flight))
+            )
+            fields = {"video_url": upgraded["video_url"], "preview_url": preview_url, "quality": tier, "upgrade": "completed"}
+        except Exception as e:
+            logger.error(f"Upgrade to {tier} failed for {request.description}: {getattr(e, 'detail', e)}")
+            fields = {"upgrade": "failed"}
+    quality_policy.record_upgrade(fields["upgrade"])
+    progress_bus.publish(channel, "upgraded", fields)
+    if on_upgrade:
+        on_upgrade(fields)
+
+def render_key(request: ConceptRequest, tier):
+    """Result cache key of a concept rendered at one tier"""
+    return cache_key(request.description, {**RENDER_SETTINGS, "quality": QUALITY_TIERS[tier]})
+
+def flight_key(request: ConceptRequest, tier):
+    """Single-flight key of one render; only a progressive render streams HLS, so the two never fold together"""
+    return cache_key(
+        request.description, {**RENDER_SETTINGS, "quality": QUALITY_TIERS[tier], "progressive": request.progressive}
+    )
+
+def stream_id(key):
+    """Progress channel and HLS directory of one render, shared by every request single-flight folds into it"""
+    return key[:16]
+
+def playlist_url(channel):
+    return f"/hls/{channel}/{PLAYLIST_NAME}"
+
+def overloaded_error(error: RenderPoolFull):
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+async def render_concept(request: ConceptRequest, request_id, work_dir, tier, channel):
+    """Run the full Gemini -> Manim -> audio -> Cloudinary pipeline for one concept in its own workspace"""
+    max_attempts = retry_policy.max_attempts
+    quality = QUALITY_TIERS[tier]
     attempt = 0
     last_error = None
-    request_id = str(uuid.uuid4())
+    # Script and error from the previous attempt, used to pick how the next attempt gets its code
+    failed_code = None
+    failed_explanation = None
+    failed_narration = None
+    failed_sections = None
+    failure_output = None
+    code_rendered = False
+    progress_bus.reset(channel)
+    
+    def publish(event, data=None):
+        progress_bus.publish(channel, event, data)
+    
+    def render_progress(script_path):
+        """Output handler that turns one manim run's progress bar into render_progress events"""
+        parser = ManimProgress()
+        def on_output(line):
+            update = parser.feed(line)
+            if update:
+                publish("render_progress", {"script": os.path.basename(script_path), **update})
+        return on_output
+    
+    loop = asyncio.get_running_loop()
+    def upload_progress(sent, total):
+        # Called from the upload thread
+        loop.call_soon_threadsafe(publish, "upload_progress", {"bytes": sent, "total": total})
+    
+    failed_stages = []
+    def on_stage_event(event, data):
+        publish(event, data)
+        if event == "stage_finished":
+            stage_seconds.observe(data["duration"], stage=data["stage"])
+            if not data["ok"]:
+                failed_stages.append(data["stage"])
+    
+    timings = StageTimings(on_event=on_stage_event)
+    spawns = track_spawns()
+    stream = HLSStream(os.path.join(HLS_DIR, channel)) if request.progressive else None
     
     logger.info(f"=== Starting concept explanation request ===")
     logger.info(f"Request ID: {request_id}")
     logger.info(f"Description: {request.description}")
     
+    stored_script = code_store.lookup(request.description)
+    
     while attempt < max_attempts:
         attempt += 1
         logger.info(f"=== Attempt {attempt}/{max_attempts} ===")
+        publish("attempt", {"attempt": attempt, "max_attempts": max_attempts, "quality": tier})
+        failed_stages.clear()
         
+        python_code = None
+        code_source = None
+        audio_task = None
+        section_clips_task = None
         try:
-            # Enhanced prompt with stricter requirements and better guidance
-            prompt = f"""
-                Generate Manim code to create a detailed, educational animation explaining the concepts requested.
-                Use your creativity and artistic flair to make the animation visually appealing and engaging. At the same time
-                the concepts should be clear and easy to understand. The animation should be suitable for educational purposes.
-
-                STRICT REQUIREMENTS:
-                1. The code MUST be complete, runnable, and error-free
-                2. Use appropriate Manim constructs (MathTex, Text, etc.) with proper syntax
-                3. Include step-by-step visual transitions that build understanding
-                4. ALL elements MUST stay within the frame at all times
-                5. Use a consistent, visually appealing color scheme with good contrast
-                6. Text must be readable (appropriate size and duration on screen)
-                7. Include at least 3-4 distinct scenes or concepts to ensure depth
-                8. Add meaningful labels and annotations to clarify concepts
-                9. The class name MUST be "ExplainConcept" and inherit from Scene
-                10. IMPORTANT: Add proper timing with self.wait() commands between animations
-                11. Each scene should display for at least 2-3 seconds using self.wait(2) or self.wait(3)
-                12. End with self.wait(2) to ensure complete rendering
-                13. DO NOT use any Unicode characters, emojis, or special symbols in the code
-                14. Use only ASCII characters and standard English text
-                15. Replace any symbols with descriptive text (e.g., "lock" instead of 🔒)
-                
-                The animation should be 40-60 seconds in length with smooth transitions.
-                
-                For the explanation:
-                - Provide a concise but detailed explanation (150-250 words)
-                - Highlight 3-5 key points illustrated in the visualization
-                - Explain the educational value of specific visual elements
-                - Use clear, direct language without unnecessary jargon
-                
-                DO NOT REFERENCE ANY EXTERNAL SVG OR IMAGE FILES.
-                DO NOT USE UNICODE CHARACTERS OR EMOJIS IN THE CODE.
-                Return only the Python code without any explanations or markdown.
-                Also provide a brief explanation of the visualization. Address the animation as visualization in explanation.
-            """
-
-            logger.info("Generating code with Gemini...")
-            response = client.models.generate_content(
-                model="gemini-2.0-flash", contents=request.description, config={
-                    'system_instruction': prompt,
-                    'response_mime_type': 'application/json',
-                    'response_schema':  {
-                        "type": "object",
-                        "properties": {
-                            "python_code": {
-                                "type": "string"
-                            },
-                            "explanation": {
-                                "type": "string"
-                            }
-                        },
-                        "required": ["python_code", "explanation"]
-                    }
-                }
-            )
-
-            json_response = json.loads(response.text)
-            python_code = json_response["python_code"]
-            explanation = json_response["explanation"]
-            logger.info("Code generated successfully")
+            if stored_script and attempt == 1:
+                # A script for this concept already rendered successfully - skip the LLM
+                logger.info(f"Reusing stored script {stored_script['code_hash'][:12]}")
+                python_code = stored_script["python_code"]
+                explanation = stored_script["explanation"]
+                narration = stored_script.get("narration")
+                narration_sections = json.loads(stored_script.get("narration_sections") or "null")
+                code_source = "store"
+            elif failed_code and code_rendered:
+                # The script rendered fine and a later stage failed - render it again as is
+                python_code, explanation, narration = failed_code, failed_explanation, failed_narration
+                narration_sections = failed_sections
+                code_source = "reuse"
+            elif failed_code and failure_output and retry_policy.strategy == STRATEGY_REPAIR:
+                async with timings.stage("repair", attempt):
+                    python_code, explanation, narration, narration_sections = await repair_manim_code(
+                        request.description, failed_code, failed_narration, failed_sections, failure_output
+                    )
+                code_source = "repair"
+            else:
+                async with timings.stage("generate", attempt):
+                    python_code, explanation, narration, narration_sections = await generate_manim_code(request.description)
+                code_source = "gemini"
+            code_rendered = False
+            
+            # Reject obviously broken code in-process instead of paying for a manim launch
+            async with timings.stage("validate", attempt):
+                validate_manim_code(python_code)
         
-            # Create files in a directory outside the project structure to avoid reload issues
-            temp_base_dir = os.path.join(os.path.expanduser("~"), "manim_temp")
-            os.makedirs(temp_base_dir, exist_ok=True)
+            # The workspace is outside the project structure to avoid reload issues, and private
+            # to this render so Tex caches and partial movie files go away with it
+            temp_base_dir = work_dir
             logger.info(f"Using temp directory: {temp_base_dir}")
             
             script_path = os.path.join(temp_base_dir, f"concept_{request_id}.py")
@@ -206,35 +585,63 @@ async def explain_concept(request: ConceptRequest):
             media_dir = os.path.join(temp_base_dir, "media")
             os.makedirs(media_dir, exist_ok=True)
             logger.info(f"Media directory: {media_dir}")
+            linked = await run_blocking(glyph_cache.link_into, media_dir)
+            logger.info(f"Linked {linked} cached glyphs into the media directory")
             
             # Log directory state before Manim execution
             log_directory_contents(temp_base_dir, "Before Manim execution")
             
+            # The narration is known before rendering, so synthesize it while Manim runs:
+            # one clip per section when the script is sectioned, else a single track
+            if NARRATION_SOURCE == "script" and narration_sections and count_segments(python_code) > 1:
+                section_clips_task = asyncio.create_task(
+                    timings.run("tts", synthesize_section_clips(narration_sections, temp_base_dir, request_id), attempt)
+                )
+            elif NARRATION_SOURCE == "script" and narration and len(narration) >= 50:
+                audio_path = os.path.join(temp_base_dir, f"audio_{request_id}.wav")
+                audio_task = asyncio.create_task(
+                    timings.run("tts", synthesize_narration_audio(narration, audio_path), attempt)
+                )
+            
             # Run Manim with the external directory
             logger.info("Starting Manim execution...")
-            manim_command = ["manim", "-qm", "--media_dir", media_dir, script_path, "ExplainConcept"]
-            logger.info(f"Manim command: {' '.join(manim_command)}")
-            
-            result = subprocess.run(
-                manim_command,
-                capture_output=True,
-                text=True,
-                cwd=temp_base_dir
-            )
+            render_started = time.monotonic()
+            if stream:
+                stream.start()
+            sectioned = (request.parallel_sections or request.progressive) and count_segments(python_code) > 1
+            async with timings.stage("render", attempt):
+                if sectioned:
+                    result = await render_sections_parallel(
+                        python_code, script_path, media_dir, quality,
+                        lambda path: render_script(path, media_dir, temp_base_dir, quality, on_output=render_progress(path)),
+                        on_section=stream.add_section if stream else None
+                    )
+                else:
+                    result = await render_script(
+                        script_path, media_dir, temp_base_dir, quality, on_output=render_progress(script_path)
+                    )
+            render_time = time.monotonic() - render_started
+            
+            # Share newly typeset formulas and text even if the scene itself failed later on
+            try:
+                await run_blocking(glyph_cache.publish, media_dir)
+            except Exception as e:
+                logger.error(f"Could not publish glyphs to the cache: {e}")
             
             logger.info(f"Manim execution completed with return code: {result.returncode}")
-            logger.info(f"Manim stdout: {result.stdout}")
+            # Full manim output only matters when debugging; failures keep their stderr in the error
+            logger.debug(f"Manim stdout: {result.stdout}")
             if result.stderr:
-                logger.warning(f"Manim stderr: {result.stderr}")
+                logger.debug(f"Manim stderr: {result.stderr}")
             
             if result.returncode != 0:
-                raise Exception(f"Manim execution failed: {result.stderr}")
+                raise ManimRenderError(f"Manim execution failed: {result.stderr}", result.stderr)
 
             # Log directory state after Manim execution
             log_directory_contents(media_dir, "After Manim execution")
 
-            # Find the generated video file using a glob pattern to match any video file in the 720p30 directory
-            video_dir = os.path.join(media_dir, "videos", f"concept_{request_id}", "720p30")
+            # Find the generated video file using a glob pattern to match any video file in the quality directory
+            video_dir = os.path.join(media_dir, "videos", f"concept_{request_id}", QUALITY_DIRS[quality])
             logger.info(f"Looking for video files in: {video_dir}")
             
             # Log the video directory contents
@@ -259,7 +666,7 @@ async def explain_concept(request: ConceptRequest):
                         break
                 
                 if not video_files:
-                    raise Exception("No video file was generated")
+                    raise ManimRenderError("No video file was generated", result.stdout + result.stderr)
 
             # Use the first video file found
             video_path = video_files[0]
@@ -269,20 +676,48 @@ async def explain_concept(request: ConceptRequest):
             if os.path.exists(video_path):
                 video_size = os.path.getsize(video_path)
                 logger.info(f"Video file size: {video_size} bytes")
-                
-                # Wait for file to be stable
-                if not wait_for_file_stability(video_path):
-                    logger.warning("Video file may not be completely written")
-                
             else:
                 raise Exception(f"Video file does not exist: {video_path}")
             
+            # Manim has exited, so the file is complete; one ffprobe confirms the container is readable
+            try:
+                video_info = await probe_media(video_path)
+            except Exception as probe_error:
+                raise ManimRenderError(f"Rendered video is not readable: {probe_error}", str(probe_error))
+            
+            code_rendered = True
+            
+            # The whole silent video is watchable now; the narrated MP4 follows once uploaded
+            if stream:
+                if not sectioned:
+                    await stream.add_section(0, video_path)
+                stream.finish()
+            
+            # Remember the script that produced this video so re-renders can skip Gemini
+            if code_source != "store":
+                try:
+                    code_store.save(
+                        request.description, python_code, explanation, narration=narration,
+                        narration_sections=narration_sections,
+                        duration=video_info["duration"], frame_count=video_info["frame_count"],
+                        render_time=render_time
+                    )
+                except Exception as store_error:
+                    logger.error(f"Failed to store validated script: {store_error}")
+            
             final_video_path = video_path
             
             # Try to add audio to the video
             try:
                 logger.info("Attempting to add audio to video...")
-                final_video_path = await add_audio_to_video(video_path, request.description, request_id, temp_base_dir)
+                async with timings.stage("audio_mux", attempt):
+                    final_video_path = await add_audio_to_video(
+                        video_path, request.description, request_id, temp_base_dir,
+                        narration=narration if NARRATION_SOURCE == "script" else None,
+                        audio_task=audio_task,
+                        section_clips_task=section_clips_task,
+                        video_duration=video_info["duration"]
+                    )
                 logger.info(f"Audio added successfully. Final video: {final_video_path}")
             except Exception as audio_error:
                 logger.error(f"Audio generation failed: {audio_error}. Proceeding with original video.")
@@ -292,38 +727,78 @@ async def explain_concept(request: ConceptRequest):
             if os.path.exists(final_video_path):
                 final_size = os.path.getsize(final_video_path)
                 logger.info(f"Final video file size before upload: {final_size} bytes")
-                
-                # Wait for final file stability
-                if not wait_for_file_stability(final_video_path):
-                    logger.warning("Final video file may not be completely written")
-                
             else:
                 raise Exception(f"Final video file does not exist: {final_video_path}")
             
-            # Upload to Cloudinary
-            logger.info("Starting Cloudinary upload...")
-            upload_result = cloudinary.uploader.upload(
-                final_video_path,
-                resource_type="video",
-                folder="concept_explanations"
-            )
-            logger.info(f"Cloudinary upload successful: {upload_result['secure_url']}")
+            # Publish the video (chunked and resumable on Cloudinary)
+            logger.info("Starting upload...")
+            async with timings.stage("upload", attempt):
+                video_url = await storage.upload(final_video_path, on_progress=upload_progress)
+            logger.info(f"Upload successful: {video_url}")
             
             # Cleanup all generated files
             logger.info("Starting cleanup...")
             cleanup_files(script_path, media_dir, request_id, temp_base_dir)
             logger.info("Cleanup completed")
             
+            attempt_stats.record(code_source, True)
+            attempts_total.inc(source=code_source, outcome="success")
+            finish_tracking(spawns)
+            publish("completed", {"video_url": video_url, "attempts": attempt})
+            
             # Return the URL of the uploaded video
             return {
-                "video_url": upload_result["secure_url"],
+                "video_url": video_url,
                 "explanation": explanation,
-                "attempts": attempt
+                "attempts": attempt,
+                "cached": False,
+                "code_source": code_source,
+                "timings": timings.report(),
+                "playlist_url": playlist_url(channel) if stream else None,
+                "processes_spawned": spawns["spawned"]
             }
                 
+        except asyncio.CancelledError:
+            # Cancelled by the client or the cancel endpoint; the subprocesses are already killed
+            logger.info(f"Render {request_id} cancelled during attempt {attempt}")
+            for task in (audio_task, section_clips_task):
+                if task:
+                    task.cancel()
+            cleanup_files(
+                locals().get('script_path'),
+                locals().get('media_dir'),
+                request_id,
+                locals().get('temp_base_dir')
+            )
+            finish_tracking(spawns)
+            publish("cancelled", {"attempt": attempt})
+            raise
         except Exception as e:
             last_error = str(e)
             logger.error(f"Attempt {attempt} failed: {last_error}")
+            if code_source:
+                attempt_stats.record(code_source, False)
+                attempts_total.inc(source=code_source, outcome="failure")
+            failures_total.inc(cause=failure_cause(e, failed_stages[0] if failed_stages else None))
+            
+            # Stop narration synthesized for a render that will not be used
+            for task in (audio_task, section_clips_task):
+                if task:
+                    task.cancel()
+                    if task.done() and not task.cancelled():
+                        task.exception()
+            
+            # Keep what the repair strategy needs: the failing code and a trimmed error
+            failed_code = python_code
+            failed_explanation = locals().get('explanation')
+            failed_narration = locals().get('narration')
+            failed_sections = locals().get('narration_sections')
+            if isinstance(e, CodeValidationError):
+                failure_output = "\n".join(e.errors)
+            elif isinstance(e, ManimRenderError):
+                failure_output = trim_traceback(e.stderr)
+            else:
+                failure_output = None
             
             # Log directory state on error
             try:
@@ -343,44 +818,72 @@ async def explain_concept(request: ConceptRequest):
             except Exception as cleanup_error:
                 logger.error(f"Cleanup error: {cleanup_error}")
             
-            # Wait a short time before retrying
+            # Back off before retrying
             if attempt < max_attempts:
-                logger.info(f"Waiting before retry...")
-                time.sleep(2)
+                delay = retry_policy.delay(attempt)
+                logger.info(f"Waiting {delay:.1f}s before retry...")
+                publish("retry", {"attempt": attempt, "error": last_error[:500], "delay": delay})
+                await asyncio.sleep(delay)
     
     # If we've exhausted all attempts, raise an exception
+    finish_tracking(spawns)
+    publish("failed", {"attempts": max_attempts, "error": last_error[:500]})
     logger.error(f"All attempts failed. Last error: {last_error}")
     raise HTTPException(status_code=500, detail=f"Failed after {max_attempts} attempts. Last error: {last_error}")
 
-async def add_audio_to_video(video_path, concept_description, request_id, temp_base_dir):
-    """Add audio narration to the video using Gemini for transcript and pyttsx3 for TTS"""
-    
-    logger.info(f"=== Starting audio generation ===")
-    logger.info(f"Input video: {video_path}")
-    
-    # First, get video duration for reference
-    try:
-        ffprobe_result = subprocess.run([
-            "ffprobe", "-v", "quiet", "-show_entries", "format=duration", 
-            "-of", "csv=p=0", video_path
-        ], capture_output=True, text=True)
-        
-        if ffprobe_result.returncode == 0:
-            video_duration = float(ffprobe_result.stdout.strip())
-            logger.info(f"Original video duration: {video_duration} seconds")
-        else:
-            logger.warning("Could not determine video duration")
-            video_duration = 30.0  # Default fallback
-    except Exception as e:
-        logger.error(f"Error getting video duration: {e}")
-        video_duration = 30.0
-    
-    # Upload video to Gemini for transcript generation
+def failure_cause(error, failed_stage):
+    """Coarse reason an attempt failed, for the failures metric"""
+    if isinstance(error, CodeValidationError):
+        return "validation"
+    if isinstance(error, ManimRenderError):
+        if "timed out" in error.stderr:
+            return "render_timeout"
+        if "killed by signal" in error.stderr:
+            return "render_limit"
+        return "render"
+    return failed_stage or "other"
+
+async def render_script(script_path, media_dir, cwd, quality, on_output=None):
+    """Render one script with the configured backend while holding a render slot.
+
+    on_output receives manim's output lines as they are printed (CLI backend only).
+    """
+    async with render_pool.slot():
+        if warm_renderer:
+            logger.info(f"Rendering {os.path.basename(script_path)} on a warm Manim worker")
+            return await warm_renderer.render(
+                script_path, media_dir, quality, cwd, config={"save_sections": True, "no_latex_cleanup": True},
+                timeout=RENDER_TIMEOUT, limits=RENDER_LIMITS
+            )
+        # --save_sections writes the section index the narration is aligned to
+        manim_command = [
+            "manim", quality, "--save_sections", "--no_latex_cleanup",
+            "--media_dir", media_dir, script_path, "ExplainConcept"
+        ]
+        logger.info(f"Manim command: {' '.join(manim_command)}")
+        try:
+            result = await run_command(
+                manim_command, cwd=cwd, on_output=on_output,
+                timeout=RENDER_TIMEOUT, preexec_fn=render_preexec
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Manim timed out after {RENDER_TIMEOUT:.0f}s")
+            return subprocess.CompletedProcess(
+                manim_command, 1, "",
+                f"Render timed out after {RENDER_TIMEOUT:.0f}s - the scene is too long or never finishes"
+            )
+        if result.returncode < 0:
+            # Killed by a signal: usually the CPU (SIGXCPU), memory or file size limit
+            result.stderr += f"\nRender killed by signal {-result.returncode} (CPU, memory or output size limit)"
+        return result
+
+async def transcribe_video(video_path, concept_description):
+    """Upload the rendered video to Gemini and ask for a narration transcript (fallback path)"""
     uploaded_file = None
     try:
         # Upload the video file to Gemini
         logger.info("Uploading video to Gemini...")
-        uploaded_file = client.files.upload(file=video_path)
+        uploaded_file = await gemini().aio.files.upload(file=video_path)
         logger.info(f"Uploaded file: {uploaded_file.name}")
         
         # Wait for the file to be in ACTIVE state
@@ -388,11 +891,12 @@ async def add_audio_to_video(video_path, concept_description, request_id, temp_b
         max_wait_time = 60  # 1 minute maximum wait time
         wait_interval = 2    # Check every 2 seconds
         elapsed_time = 0
+        wait_started = time.monotonic()
         
         while elapsed_time < max_wait_time:
             try:
                 # Get the current file status
-                file_status = client.files.get(name=uploaded_file.name)
+                file_status = await gemini().aio.files.get(name=uploaded_file.name)
                 logger.info(f"File state: {file_status.state}, elapsed time: {elapsed_time}s")
                 
                 if file_status.state == "ACTIVE":
@@ -402,14 +906,15 @@ async def add_audio_to_video(video_path, concept_description, request_id, temp_b
                     raise Exception(f"File processing failed: {uploaded_file.name}")
                 
                 # Wait before checking again
-                time.sleep(wait_interval)
+                await asyncio.sleep(wait_interval)
                 elapsed_time += wait_interval
                 
             except Exception as status_error:
                 logger.error(f"Error checking file status: {status_error}")
-                time.sleep(wait_interval)
+                await asyncio.sleep(wait_interval)
                 elapsed_time += wait_interval
         
+        gemini_file_active_seconds.observe(time.monotonic() - wait_started)
         if elapsed_time >= max_wait_time:
             raise Exception(f"File did not become ACTIVE within {max_wait_time} seconds")
         
@@ -430,139 +935,150 @@ async def add_audio_to_video(video_path, concept_description, request_id, temp_b
         Make sure the script is long enough to provide meaningful educational content.
         """
         
-        transcript_response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[uploaded_file, transcript_prompt]
-        )
+        with gemini_seconds.time(call="transcribe"):
+            transcript_response = await gemini().aio.models.generate_content(
+                model="gemini-2.0-flash",
+                contents=[uploaded_file, transcript_prompt]
+            )
         
         transcript = transcript_response.text.strip()
         logger.info(f"Generated transcript length: {len(transcript)} characters")
         logger.info(f"Generated transcript preview: {transcript[:200]}...")
-        
-        # Validate transcript length
-        if len(transcript) < 50:
-            logger.warning("Transcript too short, generating fallback")
-            transcript = f"This educational animation demonstrates the concept of {concept_description}. " \
-                        f"Watch carefully as we explore the key principles and applications. " \
-                        f"The visualization shows step-by-step how these concepts work in practice. " \
-                        f"Pay attention to the transitions and explanations provided throughout the animation."
-        
-        # Generate audio using pyttsx3
-        audio_path = os.path.join(temp_base_dir, f"audio_{request_id}.wav")
-        logger.info(f"Generating audio file: {audio_path}")
-        
-        # Initialize TTS engine with better error handling
-        try:
-            tts_engine = pyttsx3.init()
-            
-            # Set properties for better quality
-            tts_engine.setProperty('rate', 140)  # Slightly slower for clarity
-            tts_engine.setProperty('volume', 0.9)  # Volume level
-            
-            # Get available voices and set a clear one if possible
-            voices = tts_engine.getProperty('voices')
-            if voices:
-                logger.info(f"Available voices: {len(voices)}")
-                # Try to find a good voice
-                for voice in voices:
-                    logger.info(f"Voice: {voice.name} - {voice.id}")
-                    if 'female' in voice.name.lower() or 'woman' in voice.name.lower():
-                        tts_engine.setProperty('voice', voice.id)
-                        logger.info(f"Selected voice: {voice.name}")
-                        break
-                else:
-                    # If no female voice found, use the first available voice
-                    tts_engine.setProperty('voice', voices[0].id)
-                    logger.info(f"Selected default voice: {voices[0].name}")
-            
-            # Save audio to file
-            logger.info("Generating TTS audio...")
-            tts_engine.save_to_file(transcript, audio_path)
-            tts_engine.runAndWait()
-            
-            # Clean up TTS engine
+        return transcript
+    finally:
+        # Clean up uploaded file from Gemini
+        if uploaded_file:
             try:
-                tts_engine.stop()
-            except:
-                pass
-                
-        except Exception as tts_error:
-            logger.error(f"TTS engine error: {tts_error}")
-            raise Exception(f"Failed to generate audio: {tts_error}")
-        
-        # Verify audio file was created and check its properties
-        if not os.path.exists(audio_path):
-            raise Exception("Audio file was not created")
-        
-        audio_size = os.path.getsize(audio_path)
-        logger.info(f"Audio file generated: {audio_path} ({audio_size} bytes)")
-        
-        if audio_size == 0:
-            raise Exception("Audio file is empty")
-        
-        # Check audio duration
+                logger.info(f"Cleaning up uploaded file: {uploaded_file.name}")
+                await gemini().aio.files.delete(name=uploaded_file.name)
+                logger.info("Gemini file cleanup completed")
+            except Exception as cleanup_error:
+                logger.error(f"Failed to cleanup uploaded file from Gemini: {cleanup_error}")
+
+async def resolve_transcript(video_path, concept_description, narration=None):
+    """Pick the narration text: the script narration if usable, else a transcript of the video"""
+    if narration and len(narration) >= 50:
+        # Narration came with the script - no need to upload the video and wait for Gemini
+        logger.info(f"Using script narration ({len(narration)} characters), skipping video upload")
+        transcript = narration
+    else:
+        transcript = await transcribe_video(video_path, concept_description)
+    
+    # Validate transcript length
+    if len(transcript) < 50:
+        logger.warning("Transcript too short, generating fallback")
+        transcript = f"This educational animation demonstrates the concept of {concept_description}. " \
+                    f"Watch carefully as we explore the key principles and applications. " \
+                    f"The visualization shows step-by-step how these concepts work in practice. " \
+                    f"Pay attention to the transitions and explanations provided throughout the animation."
+    return transcript
+
+async def synthesize_narration_audio(transcript, audio_path):
+    """Synthesize the narration to a WAV file and verify it; returns the audio path"""
+    logger.info(f"Generating audio file: {audio_path}")
+    
+    try:
+        await tts_service.synthesize(transcript, audio_path)
+    except Exception as tts_error:
+        logger.error(f"TTS engine error: {tts_error}")
+        raise Exception(f"Failed to generate audio: {tts_error}")
+    
+    # Verify audio file was created and check its properties
+    if not os.path.exists(audio_path):
+        raise Exception("Audio file was not created")
+    
+    audio_size = os.path.getsize(audio_path)
+    logger.info(f"Audio file generated: {audio_path} ({audio_size} bytes)")
+    
+    if audio_size == 0:
+        raise Exception("Audio file is empty")
+    
+    # Check audio duration from the WAV header, no ffprobe needed
+    try:
+        audio_duration = wav_duration(audio_path)
+    except Exception as duration_error:
+        raise Exception(f"Audio file is not a readable WAV: {duration_error}")
+    logger.info(f"Generated audio duration: {audio_duration} seconds")
+    if audio_duration < 1.0:
+        logger.warning(f"Audio duration too short: {audio_duration} seconds")
+    
+    return audio_path
+
+async def synthesize_section_clips(narration_sections, temp_base_dir, request_id):
+    """Synthesize one narration clip per scene section; returns clips in section order"""
+    clips = []
+    for index, section in enumerate(narration_sections):
+        text = (section.get("narration") or "").strip()
+        if not text:
+            continue
+        clip_path = os.path.join(temp_base_dir, f"audio_{request_id}_{index:02d}.wav")
+        await tts_service.synthesize(text, clip_path)
+        if not os.path.exists(clip_path) or os.path.getsize(clip_path) == 0:
+            raise Exception(f"Narration clip for section '{section.get('name')}' was not created")
+        clips.append({
+            "name": section.get("name"),
+            "path": clip_path,
+            "duration": wav_duration(clip_path)
+        })
+    if not clips:
+        raise Exception("No section narration to synthesize")
+    logger.info(f"Synthesized {len(clips)} section narration clips")
+    return clips
+
+async def add_audio_to_video(video_path, concept_description, request_id, temp_base_dir, narration=None,
+                             audio_task=None, section_clips_task=None, video_duration=None):
+    """Add audio narration to the video using the script narration (or a Gemini transcript) and pyttsx3 for TTS.
+
+    If audio_task is given it must resolve to an already synthesized narration WAV. If
+    section_clips_task is given it must resolve to per-section clips, which are placed at
+    the section start times recorded by `manim --save_sections`; when it fails the flat
+    narration is synthesized as a single track instead. Pass video_duration when the
+    video was already probed.
+    """
+    
+    logger.info(f"=== Starting audio generation ===")
+    logger.info(f"Input video: {video_path}")
+    
+    # First, get video duration for reference
+    if video_duration is None:
         try:
-            ffprobe_audio_result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration", 
-                "-of", "csv=p=0", audio_path
-            ], capture_output=True, text=True)
-            
-            if ffprobe_audio_result.returncode == 0:
-                audio_duration = float(ffprobe_audio_result.stdout.strip())
-                logger.info(f"Generated audio duration: {audio_duration} seconds")
-                
-                if audio_duration < 1.0:
-                    raise Exception(f"Audio duration too short: {audio_duration} seconds")
-            else:
-                logger.warning("Could not determine audio duration")
-                
-        except Exception as duration_error:
-            logger.error(f"Error checking audio duration: {duration_error}")
-        
-        # Wait for audio file stability
-        if not wait_for_file_stability(audio_path, max_wait=10):
-            logger.warning("Audio file may not be completely written")
-        
-        # Combine video and audio using ffmpeg with better options
+            video_duration = (await probe_media(video_path))["duration"] or 30.0
+        except Exception as e:
+            logger.error(f"Error getting video duration: {e}")
+            video_duration = 30.0  # Default fallback
+    logger.info(f"Original video duration: {video_duration} seconds")
+    
+    try:
         output_video_path = os.path.join(temp_base_dir, f"final_video_{request_id}.mp4")
         logger.info(f"Combining video and audio to: {output_video_path}")
         
-        # Use different FFmpeg strategy - don't use shortest, pad audio if needed
-        ffmpeg_command = [
-            "ffmpeg", "-i", video_path, "-i", audio_path,
-            "-c:v", "copy",  # Copy video stream as-is
-            "-c:a", "aac",   # Encode audio as AAC
-            "-b:a", "128k",  # Set audio bitrate
-            "-filter_complex", f"[1:a]apad=pad_dur={video_duration}[padded_audio]",  # Pad audio to video length
-            "-map", "0:v:0", "-map", "[padded_audio]",  # Map video and padded audio
-            "-shortest",     # Still use shortest but now audio is padded
-            "-y", output_video_path
-        ]
-        logger.info(f"FFmpeg command: {' '.join(ffmpeg_command)}")
+        audio_clips = None
+        if section_clips_task:
+            # Start every section's clip where Manim started that section
+            try:
+                clips = await section_clips_task
+                audio_clips = place_section_clips(clips, load_section_timings(video_path))
+            except Exception as section_error:
+                # The whole narration as one track still beats publishing a silent video
+                logger.error(f"Section narration failed, falling back to a single track: {section_error}")
+        if audio_clips is None:
+            if audio_task:
+                # The narration was synthesized while Manim rendered
+                audio_path = await audio_task
+            else:
+                audio_path = os.path.join(temp_base_dir, f"audio_{request_id}.wav")
+                transcript = await resolve_transcript(video_path, concept_description, narration)
+                await synthesize_narration_audio(transcript, audio_path)
+            audio_clips = [{"path": audio_path, "start": 0.0}]
         
-        ffmpeg_result = subprocess.run(ffmpeg_command, capture_output=True, text=True)
+        # Delay, mix, pad and mux the narration in a single ffmpeg pass
+        ffmpeg_command = build_mux_command(video_path, audio_clips, video_duration, output_video_path)
+        logger.info(f"FFmpeg command: {' '.join(ffmpeg_command)}")
         
+        ffmpeg_result = await run_command(ffmpeg_command, timeout=MEDIA_TIMEOUT)
         logger.info(f"FFmpeg return code: {ffmpeg_result.returncode}")
-        logger.info(f"FFmpeg stdout: {ffmpeg_result.stdout}")
-        if ffmpeg_result.stderr:
-            logger.info(f"FFmpeg stderr: {ffmpeg_result.stderr}")
-        
         if ffmpeg_result.returncode != 0:
-            # Try fallback method without audio padding
-            logger.warning("FFmpeg with padding failed, trying fallback method...")
-            ffmpeg_fallback_command = [
-                "ffmpeg", "-i", video_path, "-i", audio_path,
-                "-c:v", "copy", "-c:a", "aac", "-b:a", "128k",
-                "-map", "0:v:0", "-map", "1:a:0",
-                "-t", str(video_duration),  # Limit to video duration
-                "-y", output_video_path
-            ]
-            
-            ffmpeg_result = subprocess.run(ffmpeg_fallback_command, capture_output=True, text=True)
-            logger.info(f"Fallback FFmpeg return code: {ffmpeg_result.returncode}")
-            
-            if ffmpeg_result.returncode != 0:
-                raise Exception(f"FFmpeg failed: {ffmpeg_result.stderr}")
+            raise Exception(f"FFmpeg failed: {ffmpeg_result.stderr}")
         
         # Verify final video was created
         if not os.path.exists(output_video_path):
@@ -574,34 +1090,24 @@ async def add_audio_to_video(video_path, concept_description, request_id, temp_b
         if final_video_size == 0:
             raise Exception("Final video file is empty")
         
-        # Check final video duration
-        try:
-            ffprobe_final_result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration", 
-                "-of", "csv=p=0", output_video_path
-            ], capture_output=True, text=True)
-            
-            if ffprobe_final_result.returncode == 0:
-                final_duration = float(ffprobe_final_result.stdout.strip())
-                logger.info(f"Final video duration: {final_duration} seconds")
-                
-                if final_duration < video_duration * 0.5:
-                    logger.warning(f"Final video duration seems too short: {final_duration}s vs original {video_duration}s")
-            
-        except Exception as final_duration_error:
-            logger.error(f"Error checking final video duration: {final_duration_error}")
+        # ffmpeg has exited, so the file is complete; one ffprobe confirms the container is readable
+        final_info = await probe_media(output_video_path)
+        if final_info["audio"] is None:
+            raise Exception("Final video has no audio stream")
         
-        # Wait for final video stability
-        if not wait_for_file_stability(output_video_path, max_wait=15):
-            logger.warning("Final video file may not be completely written")
+        final_duration = final_info["duration"] or 0
+        logger.info(f"Final video duration: {final_duration} seconds")
+        if final_duration < video_duration * 0.5:
+            logger.warning(f"Final video duration seems too short: {final_duration}s vs original {video_duration}s")
         
-        # Clean up temporary audio file
-        try:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.info("Temporary audio file cleaned up")
-        except Exception as cleanup_error:
-            logger.warning(f"Failed to cleanup audio file: {cleanup_error}")
+        # Clean up temporary audio files
+        for clip in audio_clips:
+            try:
+                if os.path.exists(clip["path"]):
+                    os.remove(clip["path"])
+                    logger.info(f"Temporary audio file cleaned up: {clip['path']}")
+            except Exception as cleanup_error:
+                logger.warning(f"Failed to cleanup audio file: {cleanup_error}")
         
         logger.info("Audio generation completed successfully")
         return output_video_path
@@ -609,15 +1115,6 @@ async def add_audio_to_video(video_path, concept_description, request_id, temp_b
     except Exception as e:
         logger.error(f"Error in add_audio_to_video: {e}")
         raise e
-    finally:
-        # Clean up uploaded file from Gemini
-        if uploaded_file:
-            try:
-                logger.info(f"Cleaning up uploaded file: {uploaded_file.name}")
-                client.files.delete(name=uploaded_file.name)
-                logger.info("Gemini file cleanup completed")
-            except Exception as cleanup_error:
-                logger.error(f"Failed to cleanup uploaded file from Gemini: {cleanup_error}")
 
 
 def cleanup_files(script_path, media_dir, request_id, temp_base_dir=None):
@@ -630,6 +1127,15 @@ def cleanup_files(script_path, media_dir, request_id, temp_base_dir=None):
             os.remove(script_path)
             logger.info(f"Removed script file: {script_path}")
         
+        # Remove per-section scripts and videos left by a parallel section render
+        if script_path:
+            for path in segment_artifacts(script_path, media_dir):
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+                logger.info(f"Removed section artifact: {path}")
+        
         # Remove the entire concept folder from media directory
         if media_dir:
             concept_folder = os.path.join(media_dir, "videos", f"concept_{request_id}")
@@ -640,7 +1146,7 @@ def cleanup_files(script_path, media_dir, request_id, temp_base_dir=None):
         # Clean up any final video files in temp directory
         if temp_base_dir:
             final_video_pattern = os.path.join(temp_base_dir, f"final_video_{request_id}.mp4")
-            audio_pattern = os.path.join(temp_base_dir, f"audio_{request_id}.wav")
+            audio_pattern = os.path.join(temp_base_dir, f"audio_{request_id}*.wav")
             
             for pattern in [final_video_pattern, audio_pattern]:
                 for file_path in glob.glob(pattern):
@@ -651,7 +1157,7 @@ def cleanup_files(script_path, media_dir, request_id, temp_base_dir=None):
             # Fallback to default temp directory
             temp_base_dir = os.path.join(os.path.expanduser("~"), "manim_temp")
             final_video_pattern = os.path.join(temp_base_dir, f"final_video_{request_id}.mp4")
-            audio_pattern = os.path.join(temp_base_dir, f"audio_{request_id}.wav")
+            audio_pattern = os.path.join(temp_base_dir, f"audio_{request_id}*.wav")
             
             for pattern in [final_video_pattern, audio_pattern]:
                 for file_path in glob.glob(pattern):
@@ -662,6 +1168,183 @@ def cleanup_files(script_path, media_dir, request_id, temp_base_dir=None):
     except Exception as e:
         logger.error(f"Error during cleanup: {e}")
 
+def start_job(job_id, request: ConceptRequest, ticket=None):
+    """Schedule a background render for a job already stored in the job store.
+
+    ticket, reserved when the job was submitted, is handed back when the job ends if
+    its render never took it over, including when the job is cancelled before it starts.
+    """
+    task = asyncio.create_task(run_job(job_id, request, ticket))
+    running_jobs[job_id] = task
+    task.add_done_callback(lambda _: running_jobs.pop(job_id, None))
+    if ticket:
+        task.add_done_callback(lambda _: ticket.release())
+    return task
+
+async def run_job(job_id, request: ConceptRequest, ticket=None):
+    logger.info(f"=== Starting job {job_id} ===")
+    job_store.mark_running(job_id)
+    
+    def on_upgrade(fields):
+        # Swap the finished job's result over to the upgraded video
+        upgrading_jobs.discard(job_id)
+        job = job_store.get(job_id)
+        if job and job["status"] == JOB_COMPLETED:
+            job_store.complete(job_id, {**job["result"], **fields})
+    
+    try:
+        result = await generate_concept_video(
+            request, request_id=job_id, on_upgrade=on_upgrade,
+            on_channel=lambda channel: job_store.set_channel(job_id, channel), ticket=ticket
+        )
+        if result.get("upgrade") == "pending":
+            upgrading_jobs.add(job_id)
+        job_store.complete(job_id, result)
+        logger.info(f"Job {job_id} completed")
+    except asyncio.CancelledError:
+        job_store.cancel(job_id)
+        logger.info(f"Job {job_id} cancelled")
+        raise
+    except HTTPException as e:
+        job_store.fail(job_id, str(e.detail))
+        logger.error(f"Job {job_id} failed: {e.detail}")
+    except Exception as e:
+        job_store.fail(job_id, str(e))
+        logger.error(f"Job {job_id} failed: {e}")
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: ConceptRequest):
+    """Submit a concept for rendering and return a job id immediately"""
+    # Reserve the job's place now, so a burst of submissions cannot all be accepted
+    try:
+        ticket = render_pool.reserve()
+    except RenderPoolFull as e:
+        raise overloaded_error(e)
+    try:
+        job_id = job_store.create(request.model_dump())
+    except Exception:
+        ticket.release()
+        raise
+    start_job(job_id, request, ticket)
+    logger.info(f"Submitted job {job_id}: {request.description}")
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        # Known once the job's render tier is chosen; poll the status URL for it
+        "playlist_url": None,
+        "status_url": f"/jobs/{job_id}",
+        "events_url": f"/jobs/{job_id}/events",
+        "result_url": f"/jobs/{job_id}/result"
+    }
+
+def job_playlist_url(job):
+    """The stream of the job's render; a finished job reports whatever its result says, so cache hits get none"""
+    if job["status"] == JOB_COMPLETED:
+        return job["result"].get("playlist_url")
+    if job["request"].get("progressive") and job["channel"]:
+        return playlist_url(job["channel"])
+    return None
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "playlist_url": job_playlist_url(job),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events stream of a job's stages, render and upload progress and retries.
+
+    Ends with a "done" event carrying the job's final status.
+    """
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        channel = None
+        queue = None
+        try:
+            while True:
+                if queue is None:
+                    # The channel is recorded once the job's render tier is chosen
+                    channel = job_store.get(job_id)["channel"]
+                    if channel:
+                        queue = progress_bus.subscribe(channel)
+                if queue is None:
+                    await asyncio.sleep(1)
+                else:
+                    try:
+                        message = await asyncio.wait_for(queue.get(), timeout=1)
+                        yield f"id: {message['id']}\nevent: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                current = job_store.get(job_id)
+                # An upgrade left pending by a restart has no task to finish it
+                upgrading = (
+                    current["status"] == JOB_COMPLETED
+                    and (current["result"] or {}).get("upgrade") == "pending"
+                    and job_id in upgrading_jobs
+                )
+                if current["status"] in (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED) and not upgrading:
+                    done = {"status": current["status"], "result": current["result"], "error": current["error"]}
+                    yield f"event: done\ndata: {json.dumps(done)}\n\n"
+                    return
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+        finally:
+            if queue is not None:
+                progress_bus.unsubscribe(channel, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; its manim/ffmpeg processes are killed and temp files removed"""
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED):
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    task = running_jobs.get(job_id)
+    if task:
+        task.cancel()
+        await asyncio.wait({task})
+    else:
+        job_store.cancel(job_id)
+    return {"job_id": job_id, "status": JOB_CANCELLED}
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] == JOB_CANCELLED:
+        raise HTTPException(status_code=410, detail="Job was cancelled")
+    if job["status"] != JOB_COMPLETED:
+        # Not ready yet - tell the client to keep polling
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job_id, "status": job["status"]},
+            headers={"Retry-After": "5"}
+        )
+    return job["result"]
+
 class VideoRequest(BaseModel):
     video_url: str
 
@@ -671,27 +1354,21 @@ async def delete_video(request: VideoRequest):
     logger.info(f"Deleting video: {video_url}")
     
     try:
-        # Extract the public_id from the Cloudinary URL
-        # Cloudinary URLs typically look like: https://res.cloudinary.com/cloud_name/video/upload/v1234567890/folder/public_id.mp4
-        match = re.search(r'upload/v\d+/(.+)\.\w+', video_url)
-        if not match:
-            raise HTTPException(status_code=400, detail="Invalid Cloudinary URL format")
-        
-        public_id = match.group(1)
-        logger.info(f"Extracted public_id: {public_id}")
-        
-        # The public_id now includes the folder, e.g., "concept_explanations/bruwtqelu1kciogqze6z"
-        # No need to add the folder prefix manually
+        try:
+            deleted = await storage.delete(video_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Delete the video from Cloudinary
-        result = cloudinary.uploader.destroy(public_id, resource_type="video")
-        logger.info(f"Cloudinary delete result: {result}")
+        if not deleted:
+            raise HTTPException(status_code=500, detail="Failed to delete video: not found")
         
-        if result.get('result') != 'ok':
-            raise HTTPException(status_code=500, detail=f"Failed to delete video: {result.get('result')}")
+        # Make sure the cache never hands out the deleted URL again
+        result_cache.invalidate_url(video_url)
         
         return {"status": "success", "message": "Video deleted successfully"}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error deleting video: {str(e)}")
@@ -709,6 +1386,68 @@ def generate_preview_image(title, concept):
     )
     return result["secure_url"]
 
+@app.get("/stats")
+async def get_stats():
+    """Render pool queue depth and wait times for capacity planning"""
+    return {
+        "render_pool": render_pool.stats(),
+        "result_cache": result_cache.stats(),
+        "code_store": {"scripts": code_store.count()},
+        "validator": validation_stats,
+        "attempts_by_strategy": attempt_stats.stats(),
+        "single_flight": {
+            "inflight": render_flights.inflight(),
+            "coalesced": render_flights.coalesced,
+            "abandoned": render_flights.abandoned
+        },
+        "warm_renderer": warm_renderer.stats() if warm_renderer else None,
+        "tts": tts_service.stats(),
+        "storage": storage.stats(),
+        "workspaces": await run_blocking(workspaces.stats),
+        "glyph_cache": await run_blocking(glyph_cache.stats),
+        "quality": quality_policy.stats(),
+        "processes": {
+            **process_stats,
+            "per_request": process_stats["spawned_by_requests"] / process_stats["requests"] if process_stats["requests"] else None
+        },
+        "running_jobs": len(running_jobs)
+    }
+
+def _temp_dir_bytes():
+    sizes = {(tier,): usage["bytes"] for tier, usage in workspaces.stats()["usage"].items()}
+    sizes[("hls",)] = directory_size(HLS_DIR)
+    sizes[("glyph_cache",)] = directory_size(glyph_cache.root)
+    sizes[("tts_cache",)] = directory_size(tts_service.cache_dir)
+    return sizes
+
+registry.callback(
+    "rancho_cache_lookups_total", "Lookups in the result, TTS and Tex glyph caches", "counter",
+    lambda: {
+        ("result", "hit"): result_cache.hits, ("result", "miss"): result_cache.misses,
+        ("tts", "hit"): tts_service.hits, ("tts", "miss"): tts_service.misses,
+        ("tex_glyph", "hit"): glyph_cache.tex_hits, ("tex_glyph", "miss"): glyph_cache.tex_misses
+    },
+    ["cache", "result"]
+)
+registry.callback(
+    "rancho_single_flight_coalesced_total", "Requests that joined an identical in-flight render", "counter",
+    lambda: render_flights.coalesced
+)
+registry.callback("rancho_jobs_in_flight", "Background jobs currently running", "gauge", lambda: len(running_jobs))
+registry.callback("rancho_renders_admitted", "Requests admitted into the render pipeline", "gauge", lambda: render_pool.admitted)
+registry.callback("rancho_renders_running", "Manim renders holding a render slot", "gauge", lambda: render_pool.running)
+registry.callback("rancho_render_upgrades_pending", "Preview upgrades still rendering", "gauge", lambda: len(upgrade_tasks))
+registry.callback(
+    "rancho_temp_dir_bytes", "Bytes on disk or tmpfs by scratch directory", "gauge", _temp_dir_bytes, ["dir"]
+)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    # Sizing the scratch directories walks them, so render off the event loop
+    body = await run_blocking(registry.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Add a debug endpoint to check logs
 @app.get("/debug/logs")
 async def get_logs():
@@ -756,7 +1495,7 @@ async def health_check():
         
         # Check manim
         try:
-            result = subprocess.run(["manim", "--version"], capture_output=True, text=True, timeout=10)
+            result = await run_command(["manim", "--version"], timeout=10)
             tools_status["manim"] = {
                 "available": result.returncode == 0,
                 "version": result.stdout.strip() if result.returncode == 0 else result.stderr.strip()
@@ -766,7 +1505,7 @@ async def health_check():
         
         # Check ffmpeg
         try:
-            result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True, timeout=10)
+            result = await run_command(["ffmpeg", "-version"], timeout=10)
             tools_status["ffmpeg"] = {
                 "available": result.returncode == 0,
                 "version": result.stdout.split('\n')[0] if result.returncode == 0 else result.stderr.strip()
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+
+class JobStore:
+    """Persistent SQLite store for /explain-concept render jobs"""
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # Stores created before progress channels were recorded lack this column
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if "channel" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN channel TEXT")
+        logger.info(f"Job store ready: {db_path}")
+
+    def create(self, request_data):
+        """Insert a new queued job and return its id"""
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, json.dumps(request_data), now, now)
+            )
+        return job_id
+
+    def _update(self, job_id, status, result=None, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+
+    def mark_running(self, job_id):
+        self._update(job_id, JOB_RUNNING)
+
+    def set_channel(self, job_id, channel):
+        """Record the progress channel of the render serving the job"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET channel = ? WHERE id = ?", (channel, job_id))
+
+    def complete(self, job_id, result):
+        self._update(job_id, JOB_COMPLETED, result=result)
+
+    def fail(self, job_id, error):
+        self._update(job_id, JOB_FAILED, error=error)
+
+    def cancel(self, job_id):
+        self._update(job_id, JOB_CANCELLED, error="Cancelled")
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it does not exist"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "request": json.loads(row["request"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "channel": row["channel"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def unfinished(self):
+        """Return jobs that were queued or running when the process last stopped"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return [self.get(row["id"]) for row in rows]
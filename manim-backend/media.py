@@ -0,0 +1,65 @@
+import os
+import json
+import logging
+from concurrency import run_command
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for any single ffmpeg/ffprobe run
+MEDIA_TIMEOUT = float(os.environ.get("MEDIA_TIMEOUT_SECONDS", "300"))
+
+
+async def probe_media(path):
+    """Read the container and every stream of a media file with a single ffprobe call.
+
+    Returns {"duration", "size", "video", "audio", "frame_count"} where video/audio are the
+    first stream of that type (ffprobe's stream dict) or None. Raises if the file is unreadable.
+    """
+    result = await run_command([
+        "ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", path
+    ], timeout=MEDIA_TIMEOUT)
+    if result.returncode != 0:
+        raise Exception(f"ffprobe failed for {path}: {result.stderr}")
+    data = json.loads(result.stdout)
+    container = data.get("format", {})
+    streams = data.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), None)
+    return {
+        "duration": float(container.get("duration", 0)) or None,
+        "size": int(container.get("size", 0)) or None,
+        "video": video,
+        "audio": audio,
+        "frame_count": (int(video.get("nb_frames", 0)) or None) if video else None
+    }
+
+
+def build_mux_command(video_path, audio_clips, video_duration, output_path):
+    """One ffmpeg command that lays narration clips over the video and writes a fast-start MP4.
+
+    audio_clips is a list of {"path", "start"} (seconds). Each clip is delayed to its start,
+    the clips are mixed, and the narration is padded or trimmed to exactly video_duration,
+    so the video stream is copied untouched and no fallback pass is needed.
+    """
+    command = ["ffmpeg", "-v", "error", "-i", video_path]
+    filters = []
+    labels = []
+    for input_index, clip in enumerate(audio_clips, start=1):
+        command += ["-i", clip["path"]]
+        delay_ms = int(round(clip.get("start", 0) * 1000))
+        filters.append(f"[{input_index}:a]adelay={delay_ms}:all=1[a{input_index}]")
+        labels.append(f"[a{input_index}]")
+    if len(labels) > 1:
+        mixed = f"{''.join(labels)}amix=inputs={len(labels)}:duration=longest:normalize=0,"
+    else:
+        mixed = labels[0]
+    filters.append(f"{mixed}apad=whole_dur={video_duration:.3f},atrim=end={video_duration:.3f}[narration]")
+    command += [
+        "-filter_complex", ";".join(filters),
+        "-map", "0:v:0", "-map", "[narration]",
+        "-c:v", "copy", "-c:a", "aac", "-b:a", "128k",
+        # Moov atom up front so players can start before the whole file has downloaded
+        "-movflags", "+faststart",
+        "-y", output_path
+    ]
+    return command
@@ -0,0 +1,181 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+# Seconds; spans a cache hit through a long 1080p render
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge read from existing state when scraped.
+
+    func returns a number, or a dict of label value tuples to numbers.
+    """
+
+    def __init__(self, name, help_text, type_name, func, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.type_name = type_name
+        self.func = func
+
+    def samples(self):
+        values = self.func()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [(self.name, tuple(str(value) for value in key), value) for key, value in values.items() if value is not None]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block took, whether or not it raised"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                for bound, count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", key + (("le", _number(bound)),), count))
+                samples.append((f"{self.name}_sum", key, total))
+                samples.append((f"{self.name}_count", key, counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, type_name, func, labelnames=()):
+        return self._register(CallbackMetric(name, help_text, type_name, func, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            for sample_name, key, value in metric.samples():
+                names = metric.labelnames
+                extra = None
+                # Histogram buckets carry the le label after the metric's own labels
+                if key and isinstance(key[-1], tuple):
+                    extra = [key[-1]]
+                    key = key[:-1]
+                lines.append(f"{sample_name}{_labels(names, key, extra)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    "rancho_stage_seconds", "Duration of pipeline stages (generate, repair, render, tts, audio_mux, upload, ...)", ["stage"]
+)
+subprocess_seconds = registry.histogram(
+    "rancho_subprocess_seconds", "Wall time of subprocesses by executable (manim, ffmpeg, ffprobe)", ["command"]
+)
+gemini_seconds = registry.histogram(
+    "rancho_gemini_seconds", "Latency of Gemini generate_content calls", ["call"]
+)
+gemini_file_active_seconds = registry.histogram(
+    "rancho_gemini_file_active_seconds", "Wait for an uploaded video to become ACTIVE in Gemini"
+)
+attempts_total = registry.counter(
+    "rancho_render_attempts_total", "Render attempts by code source and outcome", ["source", "outcome"]
+)
+failures_total = registry.counter(
+    "rancho_render_failures_total", "Failed render attempts by cause", ["cause"]
+)
@@ -0,0 +1,70 @@
+import os
+import json
+import wave
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def section_index_path(video_path, scene_name="ExplainConcept"):
+    """Where `manim --save_sections` writes the section index for a rendered video"""
+    return os.path.join(os.path.dirname(video_path), "sections", f"{scene_name}.json")
+
+
+def load_section_timings(video_path):
+    """Read section names and start times from Manim's section index.
+
+    Returns a list of {"name", "start", "duration"} in playback order, or [] when the
+    render did not save sections.
+    """
+    index_path = section_index_path(video_path)
+    if not os.path.exists(index_path):
+        return []
+    try:
+        with open(index_path) as f:
+            sections = json.load(f)
+    except Exception as e:
+        logger.error(f"Could not read section index {index_path}: {e}")
+        return []
+
+    timings = []
+    start = 0.0
+    for section in sections:
+        duration = float(section.get("duration") or 0)
+        timings.append({"name": section.get("name"), "start": start, "duration": duration})
+        start += duration
+    return timings
+
+
+def wav_duration(path):
+    """Duration of a WAV file, read from its header without spawning ffprobe"""
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+
+def place_section_clips(clips, timings):
+    """Decide when each narration clip starts.
+
+    A clip starts at its section's start time (matched by name, or by position when the
+    names do not line up but the counts do). It is pushed back if the previous clip is
+    still playing, so clips never overlap.
+    """
+    starts_by_name = {timing["name"]: timing["start"] for timing in timings}
+    match_by_position = len(timings) == len(clips) and not any(clip["name"] in starts_by_name for clip in clips)
+
+    placements = []
+    previous_end = 0.0
+    for position, clip in enumerate(clips):
+        if clip["name"] in starts_by_name:
+            target = starts_by_name[clip["name"]]
+        elif match_by_position:
+            target = timings[position]["start"]
+        else:
+            target = previous_end
+        start = max(target, previous_end)
+        if start > target + 0.5:
+            logger.warning(f"Narration for section '{clip['name']}' delayed {start - target:.1f}s by the previous clip")
+        placements.append({**clip, "start": start})
+        previous_end = start + clip["duration"]
+    return placements
+
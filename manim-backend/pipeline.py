@@ -0,0 +1,72 @@
+import time
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimings:
+    """Records when each pipeline stage ran so overlapping stages and the critical path are visible"""
+
+    def __init__(self, on_event=None):
+        self.started_at = time.monotonic()
+        self.stages = []
+        # Called as on_event(event, data) when a stage starts and ends
+        self.on_event = on_event
+
+    def _notify(self, event, data):
+        if self.on_event:
+            self.on_event(event, data)
+
+    @asynccontextmanager
+    async def stage(self, name, attempt=None):
+        start = time.monotonic()
+        self._notify("stage_started", {"stage": name, "attempt": attempt})
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            end = time.monotonic()
+            self.stages.append({"stage": name, "attempt": attempt, "start": start, "end": end})
+            logger.info(f"Stage {name} took {end - start:.2f}s")
+            self._notify("stage_finished", {
+                "stage": name,
+                "attempt": attempt,
+                "duration": round(end - start, 3),
+                "ok": succeeded
+            })
+
+    async def run(self, name, coroutine, attempt=None):
+        """Await a coroutine as a timed stage; handy for stages started with asyncio.create_task"""
+        async with self.stage(name, attempt):
+            return await coroutine
+
+    def critical_path(self):
+        """Walk back from the last stage to finish, always taking the latest stage that ended before it started"""
+        remaining = sorted(self.stages, key=lambda stage: stage["end"])
+        if not remaining:
+            return []
+        path = [remaining.pop()]
+        while True:
+            before = [stage for stage in remaining if stage["end"] <= path[-1]["start"] + 1e-3]
+            if not before:
+                break
+            path.append(before[-1])
+            remaining = [stage for stage in remaining if stage["end"] < before[-1]["end"]]
+        return [stage["stage"] for stage in reversed(path)]
+
+    def report(self):
+        return {
+            "total": time.monotonic() - self.started_at,
+            "stages": [
+                {
+                    "stage": stage["stage"],
+                    "attempt": stage["attempt"],
+                    "start": round(stage["start"] - self.started_at, 3),
+                    "duration": round(stage["end"] - stage["start"], 3)
+                }
+                for stage in sorted(self.stages, key=lambda stage: stage["start"])
+            ],
+            "critical_path": self.critical_path()
+        }
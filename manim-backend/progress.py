@@ -0,0 +1,87 @@
+import re
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# tqdm line manim prints per animation, e.g. "Animation 3: Create(Circle()):  45%|####5     | 27/60 [...]"
+ANIMATION_PROGRESS = re.compile(r"Animation (\d+)\s*:\s*(.*?):\s+(\d+)%")
+
+
+class ManimProgress:
+    """Turns manim's progress-bar output into coarse progress events.
+
+    Only emits when the animation changes or its percentage moves by `step` points, so a
+    fast progress bar does not flood subscribers.
+    """
+
+    def __init__(self, step=10):
+        self.step = step
+        self._last = None
+
+    def feed(self, line):
+        match = ANIMATION_PROGRESS.search(line)
+        if not match:
+            return None
+        animation, name, percent = int(match.group(1)), match.group(2).strip(), int(match.group(3))
+        if self._last and self._last[0] == animation and percent - self._last[1] < self.step and percent < 100:
+            return None
+        if self._last == (animation, percent):
+            return None
+        self._last = (animation, percent)
+        return {"animation": animation, "name": name, "percent": percent}
+
+
+class ProgressBus:
+    """Fans progress events out to subscribers of a render, with replay for late subscribers.
+
+    Channels are named after the render (so every request single-flight folds into it sees
+    the same events) and only the most recent max_channels are kept.
+    """
+
+    def __init__(self, history=500, max_channels=256):
+        self.history = history
+        self.max_channels = max_channels
+        self._channels = OrderedDict()
+
+    def _channel(self, name):
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = {"events": deque(maxlen=self.history), "subscribers": set(), "next_id": 0}
+            self._channels[name] = channel
+            while len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        self._channels.move_to_end(name)
+        return channel
+
+    def reset(self, name):
+        """Forget the history of a channel when a new render starts on it; subscribers stay"""
+        self._channel(name)["events"].clear()
+
+    def publish(self, name, event, data=None):
+        channel = self._channel(name)
+        message = {"id": channel["next_id"], "event": event, "data": {**(data or {}), "time": time.time()}}
+        channel["next_id"] += 1
+        channel["events"].append(message)
+        for queue in channel["subscribers"]:
+            queue.put_nowait(message)
+
+    def subscribe(self, name):
+        """Return a queue that receives past and future events of the channel"""
+        channel = self._channel(name)
+        queue = asyncio.Queue()
+        for message in channel["events"]:
+            queue.put_nowait(message)
+        channel["subscribers"].add(queue)
+        return queue
+
+    def unsubscribe(self, name, queue):
+        channel = self._channels.get(name)
+        if channel:
+            channel["subscribers"].discard(queue)
+
+    def subscribers(self, name):
+        channel = self._channels.get(name)
+        return len(channel["subscribers"]) if channel else 0
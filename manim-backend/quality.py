@@ -0,0 +1,60 @@
+import os
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Render tiers, cheapest first, and the manim CLI flag for each
+QUALITY_TIERS = {"low": "-ql", "medium": "-qm", "high": "-qh"}
+TIER_ORDER = list(QUALITY_TIERS)
+
+
+class QualityPolicy:
+    """Chooses the tier a render actually runs at.
+
+    Drops one tier for every degrade_backlog requests queued behind the busy render
+    workers, never below floor, so a deep queue drains faster instead of timing out.
+    """
+
+    def __init__(self, degrade_backlog, floor):
+        if floor not in QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier: {floor}")
+        self.degrade_backlog = degrade_backlog
+        self.floor = floor
+        self.degraded = 0
+        self.previews = 0
+        self.upgrades = defaultdict(int)
+
+    def choose(self, requested, backlog):
+        requested_position = TIER_ORDER.index(requested)
+        position = requested_position
+        if self.degrade_backlog > 0:
+            position -= backlog // self.degrade_backlog
+        # The floor never raises a request above the tier it asked for
+        position = min(max(position, TIER_ORDER.index(self.floor)), requested_position)
+        tier = TIER_ORDER[position]
+        if tier != requested:
+            self.degraded += 1
+            logger.info(f"Render queue backlog {backlog}, degrading {requested} to {tier}")
+        return tier
+
+    def record_upgrade(self, status):
+        self.upgrades[status] += 1
+
+    def stats(self):
+        return {
+            "degraded": self.degraded,
+            "previews": self.previews,
+            "upgrades": dict(self.upgrades),
+            "degrade_backlog": self.degrade_backlog,
+            "floor": self.floor
+        }
+
+
+def create_quality_policy():
+    policy = QualityPolicy(
+        degrade_backlog=int(os.environ.get("QUALITY_DEGRADE_BACKLOG", "4")),
+        floor=os.environ.get("QUALITY_FLOOR", "low").lower()
+    )
+    logger.info(f"Quality policy: degrade a tier per {policy.degrade_backlog} queued renders, floor {policy.floor}")
+    return policy
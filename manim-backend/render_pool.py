@@ -0,0 +1,144 @@
+import os
+import time
+import math
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class RenderPoolFull(Exception):
+    """Raised when the render queue is full and a request must be rejected"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Render queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A place in the pipeline reserved before the render starts, e.g. when a job is submitted.
+
+    admission(ticket) takes it over; release() hands it back if it was never used.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self.held = True
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self._pool.admitted -= 1
+
+
+class RenderPool:
+    """Caps concurrent Manim renders and bounds the number of requests waiting for one.
+
+    Requests take an admission ticket for the whole pipeline (workers + max_queue tickets
+    exist in total) and a render slot only while a render process is running.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._slots = asyncio.Semaphore(workers)
+        self.admitted = 0
+        self.waiting = 0
+        self.running = 0
+        self.rejected = 0
+        self.completed = 0
+        self.wait_times = deque(maxlen=500)
+        self.render_times = deque(maxlen=500)
+
+    @property
+    def capacity(self):
+        return self.workers + self.max_queue
+
+    def is_full(self):
+        return self.admitted >= self.capacity
+
+    def retry_after(self):
+        """Estimate seconds until a ticket frees up, from recent render times"""
+        avg_render = sum(self.render_times) / len(self.render_times) if self.render_times else 60
+        backlog = max(self.admitted - self.workers + 1, 1)
+        return max(1, math.ceil(avg_render * backlog / self.workers))
+
+    def backlog(self):
+        """Admitted requests beyond what the workers can run right now"""
+        return max(self.admitted - self.workers, 0)
+
+    def check_capacity(self):
+        """Raise RenderPoolFull if no admission ticket is available"""
+        if self.is_full():
+            self.rejected += 1
+            logger.warning(f"Render pool full ({self.admitted}/{self.capacity}), rejecting request")
+            raise RenderPoolFull(self.retry_after())
+
+    def reserve(self):
+        """Take an admission ticket now, rejecting immediately if the queue is full"""
+        self.check_capacity()
+        self.admitted += 1
+        return AdmissionTicket(self)
+
+    @asynccontextmanager
+    async def admission(self, ticket=None):
+        """Hold a place in the pipeline, using ticket if one was reserved earlier"""
+        if ticket is not None and ticket.held:
+            # Take the place over, so the reserver handing its ticket back no longer frees it
+            ticket.held = False
+            ticket = AdmissionTicket(self)
+        else:
+            ticket = self.reserve()
+        try:
+            yield
+        finally:
+            ticket.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the render worker slots while a render runs"""
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        wait_time = time.monotonic() - queued_at
+        self.wait_times.append(wait_time)
+        if wait_time > 1:
+            logger.info(f"Waited {wait_time:.2f}s for a render slot")
+        self.running += 1
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.render_times.append(time.monotonic() - started_at)
+            self._slots.release()
+
+    def stats(self):
+        wait_times = sorted(self.wait_times)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "wait_time_avg": sum(wait_times) / len(wait_times) if wait_times else 0.0,
+            "wait_time_p95": wait_times[int(len(wait_times) * 0.95)] if wait_times else 0.0,
+            "wait_time_max": wait_times[-1] if wait_times else 0.0,
+            "render_time_avg": sum(self.render_times) / len(self.render_times) if self.render_times else 0.0
+        }
+
+
+def create_render_pool():
+    """Build the render pool from RENDER_WORKERS / RENDER_QUEUE_SIZE, defaulting to the CPU count"""
+    workers = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+    max_queue = int(os.environ.get("RENDER_QUEUE_SIZE", workers * 4))
+    logger.info(f"Render pool: {workers} workers, queue size {max_queue}")
+    return RenderPool(workers, max_queue)
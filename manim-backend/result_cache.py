@@ -0,0 +1,197 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_description(description):
+    """Normalize a concept description so trivial variations share a cache entry"""
+    normalized = description.strip().lower()
+    normalized = re.sub(r"\s+", " ", normalized)
+    return normalized.rstrip(" .!?")
+
+
+def cache_key(description, settings):
+    """Content-addressed key over the normalized description and the render settings"""
+    payload = json.dumps({"description": normalize_description(description), "settings": settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate(value)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache that survives restarts, with TTL and LRU eviction by last access"""
+
+    def __init__(self, db_path, max_entries, ttl):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, stored_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._conn.execute("DELETE FROM results WHERE stored_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM results WHERE key NOT IN (SELECT key FROM results ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def delete_where(self, predicate):
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT key, value FROM results").fetchall()
+            keys = [key for key, value in rows if predicate(json.loads(value))]
+            self._conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in keys])
+        return len(keys)
+
+    def size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """Caches finished explain-concept results (video_url + explanation) by concept key"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Result cache lookup failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, video_url, explanation):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, {"video_url": video_url, "explanation": explanation})
+        except Exception as e:
+            logger.error(f"Result cache store failed: {e}")
+
+    def invalidate_url(self, video_url):
+        """Drop every entry pointing at a video that no longer exists"""
+        if self.backend is None:
+            return 0
+        removed = self.backend.delete_where(lambda value: value.get("video_url") == video_url)
+        if removed:
+            logger.info(f"Invalidated {removed} cached result(s) for {video_url}")
+        return removed
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "entries": self.backend.size() if self.backend else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def create_result_cache():
+    """Build the result cache from RESULT_CACHE_BACKEND (memory, sqlite or none)"""
+    backend_name = os.environ.get("RESULT_CACHE_BACKEND", "sqlite").lower()
+    ttl = float(os.environ.get("RESULT_CACHE_TTL", 7 * 24 * 3600))
+    max_entries = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "1000"))
+
+    if backend_name == "memory":
+        backend = MemoryCacheBackend(max_entries, ttl)
+    elif backend_name == "sqlite":
+        db_path = os.environ.get(
+            "RESULT_CACHE_PATH",
+            os.path.join(os.path.expanduser("~"), "manim_temp", "result_cache.db")
+        )
+        backend = SQLiteCacheBackend(db_path, max_entries, ttl)
+    elif backend_name == "none":
+        backend = None
+    else:
+        raise ValueError(f"Unknown RESULT_CACHE_BACKEND: {backend_name}")
+
+    logger.info(f"Result cache backend: {backend_name}")
+    return ResultCache(backend)
@@ -0,0 +1,77 @@
+import os
+import re
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_REPAIR = "repair"
+STRATEGY_REGENERATE = "regenerate"
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+# Box-drawing frame characters from rich tracebacks
+TRACEBACK_FRAME = re.compile(r"[─-╿]+")
+
+
+class RetryPolicy:
+    """How many attempts a render gets, how long to back off, and how failed code is retried"""
+
+    def __init__(self, max_attempts, backoff, multiplier, max_backoff, strategy):
+        if strategy not in (STRATEGY_REPAIR, STRATEGY_REGENERATE):
+            raise ValueError(f"Unknown retry strategy: {strategy}")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.strategy = strategy
+
+    def delay(self, attempt):
+        """Seconds to wait after the given (1-based) failed attempt"""
+        return min(self.backoff * self.multiplier ** (attempt - 1), self.max_backoff)
+
+
+def create_retry_policy():
+    policy = RetryPolicy(
+        max_attempts=int(os.environ.get("RENDER_MAX_ATTEMPTS", "3")),
+        backoff=float(os.environ.get("RETRY_BACKOFF_SECONDS", "0.5")),
+        multiplier=float(os.environ.get("RETRY_BACKOFF_MULTIPLIER", "2")),
+        max_backoff=float(os.environ.get("RETRY_BACKOFF_MAX_SECONDS", "5")),
+        strategy=os.environ.get("RETRY_STRATEGY", STRATEGY_REPAIR).lower()
+    )
+    logger.info(f"Retry policy: {policy.max_attempts} attempts, strategy {policy.strategy}")
+    return policy
+
+
+def trim_traceback(stderr, max_lines=40, max_chars=4000):
+    """Keep the tail of a Manim error output: the last traceback, without colors or box frames"""
+    text = ANSI_ESCAPE.sub("", stderr or "")
+    text = TRACEBACK_FRAME.sub("", text)
+    start = text.rfind("Traceback")
+    if start != -1:
+        text = text[start:]
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    trimmed = "\n".join(lines[-max_lines:])
+    return trimmed[-max_chars:]
+
+
+class AttemptStats:
+    """Success rate of render attempts per code source (store, generate, repair, reuse)"""
+
+    def __init__(self):
+        self._attempts = defaultdict(int)
+        self._successes = defaultdict(int)
+
+    def record(self, source, success):
+        self._attempts[source] += 1
+        if success:
+            self._successes[source] += 1
+
+    def stats(self):
+        return {
+            source: {
+                "attempts": attempts,
+                "successes": self._successes[source],
+                "success_rate": self._successes[source] / attempts
+            }
+            for source, attempts in self._attempts.items()
+        }
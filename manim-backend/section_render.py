@@ -0,0 +1,182 @@
+import os
+import ast
+import json
+import glob
+import asyncio
+import subprocess
+import logging
+from concurrency import run_command
+from media import MEDIA_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Output sub-directory manim uses for each CLI quality flag
+QUALITY_DIRS = {
+    "-ql": "480p15",
+    "-qm": "720p30",
+    "-qh": "1080p60",
+    "-qp": "1440p60",
+    "-qk": "2160p60"
+}
+
+
+def _construct_body(tree):
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "ExplainConcept":
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == "construct":
+                    return item.body
+    return None
+
+
+def _is_section_marker(statement):
+    """True for a top-level `self.next_section(...)` statement"""
+    return (
+        isinstance(statement, ast.Expr)
+        and isinstance(statement.value, ast.Call)
+        and isinstance(statement.value.func, ast.Attribute)
+        and statement.value.func.attr == "next_section"
+        and isinstance(statement.value.func.value, ast.Name)
+        and statement.value.func.value.id == "self"
+    )
+
+
+def _has_preamble(body):
+    """True when statements come before the first section marker"""
+    return bool(body) and not _is_section_marker(body[0])
+
+
+def count_segments(python_code):
+    """Number of independently renderable segments, split at top-level next_section markers.
+
+    Statements before the first marker, if any, form segment 0. Returns 0 when the script
+    cannot be split (no construct, or no markers).
+    """
+    try:
+        body = _construct_body(ast.parse(python_code))
+    except SyntaxError:
+        return 0
+    if not body:
+        return 0
+    markers = sum(1 for statement in body if _is_section_marker(statement))
+    if not markers:
+        return 0
+    return markers + 1 if _has_preamble(body) else markers
+
+
+def make_segment_script(python_code, keep_index):
+    """Rewrite the script so only segment `keep_index` is rendered.
+
+    Every other section gets skip_animations=True: manim still runs its code, so scene
+    state carries over exactly, but writes no frames for it.
+    """
+    tree = ast.parse(python_code)
+    body = _construct_body(tree)
+
+    def skip_flag(index):
+        return ast.keyword(arg="skip_animations", value=ast.Constant(index != keep_index))
+
+    preamble = _has_preamble(body)
+    # Markers are numbered after the preamble segment, or from 0 when there is none
+    marker_index = 0 if preamble else -1
+    for statement in body:
+        if _is_section_marker(statement):
+            marker_index += 1
+            call = statement.value
+            call.keywords = [kw for kw in call.keywords if kw.arg != "skip_animations"] + [skip_flag(marker_index)]
+
+    if preamble:
+        # Open an explicit section for the statements before the first marker
+        opening = ast.parse("self.next_section()").body[0]
+        opening.value.keywords = [skip_flag(0)]
+        body.insert(0, opening)
+    return ast.unparse(ast.fix_missing_locations(tree))
+
+
+def _segment_video(segment_path, media_dir, quality_dir):
+    module_name = os.path.splitext(os.path.basename(segment_path))[0]
+    videos = sorted(glob.glob(os.path.join(media_dir, "videos", module_name, quality_dir, "*.mp4")))
+    return videos[0] if videos else None
+
+
+async def render_sections_parallel(python_code, script_path, media_dir, quality, render_script, on_section=None):
+    """Render each section of the scene in its own process and concatenate them losslessly.
+
+    `render_script(path)` renders one script and returns a CompletedProcess. The combined
+    movie is written where a serial render of `script_path` would have put it, so callers
+    can treat the result exactly like a normal render. `on_section(index, video_path)` is
+    awaited as soon as each section finishes, in completion order.
+    """
+    segments = count_segments(python_code)
+    base_path, _ = os.path.splitext(script_path)
+    quality_dir = QUALITY_DIRS[quality]
+
+    segment_scripts = []
+    for index in range(segments):
+        segment_path = f"{base_path}_s{index}.py"
+        with open(segment_path, "w") as f:
+            f.write(make_segment_script(python_code, index))
+        segment_scripts.append(segment_path)
+
+    async def render_segment(index, path):
+        result = await render_script(path)
+        if result.returncode == 0 and on_section:
+            await on_section(index, _segment_video(path, media_dir, quality_dir))
+        return result
+
+    logger.info(f"Rendering {segments} sections in parallel")
+    results = await asyncio.gather(*[render_segment(index, path) for index, path in enumerate(segment_scripts)])
+    for index, result in enumerate(results):
+        if result.returncode != 0:
+            logger.error(f"Section {index} failed to render")
+            return result
+
+    # A section without animations produces no movie, exactly as in a serial render
+    segment_videos = [video for video in (_segment_video(path, media_dir, quality_dir) for path in segment_scripts) if video]
+    if not segment_videos:
+        return subprocess.CompletedProcess(segment_scripts, 1, "", "No section produced a video file")
+
+    output_dir = os.path.join(media_dir, "videos", os.path.basename(base_path), quality_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, "ExplainConcept.mp4")
+    concat_list = f"{base_path}_sections.txt"
+    with open(concat_list, "w") as f:
+        for video in segment_videos:
+            f.write(f"file '{video}'\n")
+
+    # All sections share encoder settings, so the concat demuxer can join them without re-encoding
+    result = await run_command([
+        "ffmpeg", "-v", "error", "-f", "concat", "-safe", "0", "-i", concat_list,
+        "-c", "copy", "-y", output_path
+    ], timeout=MEDIA_TIMEOUT)
+    if result.returncode == 0:
+        logger.info(f"Concatenated {len(segment_videos)} sections into {output_path}")
+        _merge_section_indexes(segment_videos, output_dir)
+    return result
+
+
+def _merge_section_indexes(segment_videos, output_dir):
+    """Combine the section indexes of the segment renders (when saved) into one for the joined movie.
+
+    Every segment render lists all sections, but only its own has a video behind it.
+    """
+    merged = []
+    for video in segment_videos:
+        index_path = os.path.join(os.path.dirname(video), "sections", "ExplainConcept.json")
+        if not os.path.exists(index_path):
+            return
+        with open(index_path) as f:
+            merged.extend(section for section in json.load(f) if section.get("video"))
+    sections_dir = os.path.join(output_dir, "sections")
+    os.makedirs(sections_dir, exist_ok=True)
+    with open(os.path.join(sections_dir, "ExplainConcept.json"), "w") as f:
+        json.dump(merged, f, indent=4)
+
+
+def segment_artifacts(script_path, media_dir):
+    """Paths created by a sectioned render of script_path, for cleanup"""
+    base_path, _ = os.path.splitext(script_path)
+    paths = glob.glob(f"{base_path}_s*.py") + glob.glob(f"{base_path}_sections.txt")
+    if media_dir:
+        paths += glob.glob(os.path.join(media_dir, "videos", f"{os.path.basename(base_path)}_s*"))
+    return paths
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight task.
+
+    Later callers await the first caller's task and receive the same result or the
+    same exception. The task is cancelled once every caller waiting on it has been
+    cancelled, so an abandoned render does not hold a render slot.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._waiters = {}
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key, func):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight render for key {key[:12]}")
+        self._waiters[key] += 1
+        try:
+            # Shield so one caller going away does not cancel the render for everyone else
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._inflight.get(key) is task and self._waiters[key] == 1 and not task.done():
+                logger.info(f"Last waiter left, cancelling render for key {key[:12]}")
+                self.abandoned += 1
+                task.cancel()
+                # Let the render kill its processes and clean up before the caller moves on
+                await asyncio.wait({task})
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+
+    def has(self, key):
+        """True while a call for key is in flight, so do(key, ...) would join it"""
+        return key in self._inflight
+
+    def inflight(self):
+        return len(self._inflight)
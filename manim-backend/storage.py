@@ -0,0 +1,176 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import logging
+import cloudinary
+import cloudinary.api
+import cloudinary.utils
+import cloudinary.uploader
+import cloudinary.exceptions
+from concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Errors that will not go away by sending the same chunk again
+PERMANENT_UPLOAD_ERRORS = (
+    cloudinary.exceptions.BadRequest,
+    cloudinary.exceptions.AuthorizationRequired,
+    cloudinary.exceptions.NotAllowed,
+    cloudinary.exceptions.NotFound
+)
+
+
+class CloudinaryStorage:
+    """Publishes videos to Cloudinary with chunked, resumable uploads.
+
+    Each chunk is retried on transient failures with the same upload id and byte range,
+    so Cloudinary resumes the upload instead of the pipeline starting over.
+    """
+
+    def __init__(self, folder, chunk_size, chunk_retries, retry_backoff):
+        self.folder = folder
+        self.chunk_size = chunk_size
+        self.chunk_retries = chunk_retries
+        self.retry_backoff = retry_backoff
+        self.chunk_retried = 0
+
+    def _upload_chunk(self, file_name, chunk, http_headers, options):
+        for attempt in range(1, self.chunk_retries + 1):
+            try:
+                return cloudinary.uploader.upload_large_part((file_name, chunk), http_headers=http_headers, **options)
+            except PERMANENT_UPLOAD_ERRORS:
+                raise
+            except Exception as e:
+                if attempt == self.chunk_retries:
+                    raise
+                self.chunk_retried += 1
+                logger.warning(f"Chunk {http_headers['Content-Range']} failed ({e}), retrying")
+                time.sleep(self.retry_backoff * attempt)
+
+    def _upload_file(self, path, on_progress=None):
+        file_size = os.path.getsize(path)
+        file_name = os.path.basename(path)
+        options = {"resource_type": "video", "folder": self.folder}
+        http_headers = {"X-Unique-Upload-Id": cloudinary.utils.random_public_id()}
+        result = None
+        with open(path, "rb") as f:
+            offset = 0
+            while offset < file_size:
+                chunk = f.read(self.chunk_size)
+                http_headers["Content-Range"] = f"bytes {offset}-{offset + len(chunk) - 1}/{file_size}"
+                result = self._upload_chunk(file_name, chunk, dict(http_headers), options)
+                # Later chunks must land on the public_id Cloudinary assigned to the first one
+                options["public_id"] = result.get("public_id")
+                offset += len(chunk)
+                if on_progress:
+                    on_progress(offset, file_size)
+        return result
+
+    async def upload(self, path, on_progress=None):
+        """Upload a finished video; returns its public URL.
+
+        on_progress(bytes_sent, total_bytes) is called from the upload thread after each chunk.
+        """
+        result = await run_blocking(self._upload_file, path, on_progress)
+        return result["secure_url"]
+
+    def public_id(self, url):
+        # Cloudinary URLs look like: https://res.cloudinary.com/cloud_name/video/upload/v1234567890/folder/public_id.mp4
+        match = re.search(r'upload/v\d+/(.+)\.\w+', url)
+        if not match:
+            raise ValueError("Invalid Cloudinary URL format")
+        return match.group(1)
+
+    async def delete(self, url):
+        """Delete a published video; returns True when it was removed"""
+        result = await run_blocking(cloudinary.uploader.destroy, self.public_id(url), resource_type="video")
+        logger.info(f"Cloudinary delete result: {result}")
+        return result.get("result") == "ok"
+
+    async def exists(self, url):
+        try:
+            await run_blocking(cloudinary.api.resource, self.public_id(url), resource_type="video")
+            return True
+        except cloudinary.exceptions.NotFound:
+            return False
+
+    def stats(self):
+        return {"backend": "cloudinary", "chunk_size": self.chunk_size, "chunks_retried": self.chunk_retried}
+
+
+class LocalStorage:
+    """Publishes videos to a local directory served under url_prefix, for tests and air-gapped deployments"""
+
+    def __init__(self, root, folder, url_prefix):
+        self.root = root
+        self.folder = folder
+        self.url_prefix = url_prefix.rstrip("/")
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    def _copy(self, path, destination, on_progress=None):
+        partial_path = f"{destination}.part"
+        shutil.copyfile(path, partial_path)
+        os.replace(partial_path, destination)
+        if on_progress:
+            size = os.path.getsize(destination)
+            on_progress(size, size)
+
+    async def upload(self, path, on_progress=None):
+        name = f"{uuid.uuid4().hex}{os.path.splitext(path)[1]}"
+        await run_blocking(self._copy, path, os.path.join(self.root, self.folder, name), on_progress)
+        return f"{self.url_prefix}/{self.folder}/{name}"
+
+    def path_for(self, url):
+        """Map a published URL back to its file; only plain files directly in the storage folder qualify"""
+        if not url.startswith(f"{self.url_prefix}/{self.folder}/"):
+            raise ValueError("URL is not served by local storage")
+        name = url[len(self.url_prefix) + len(self.folder) + 2:]
+        # Exactly one plain segment: no absolute paths, sub-directories, "." or ".."
+        if not name or name in (".", "..") or "/" in name or "\\" in name or os.path.isabs(name):
+            raise ValueError("URL is not served by local storage")
+        folder = os.path.realpath(os.path.join(self.root, self.folder))
+        path = os.path.realpath(os.path.join(folder, name))
+        if os.path.commonpath([path, folder]) != folder or path == folder:
+            raise ValueError("URL is not served by local storage")
+        return path
+
+    async def delete(self, url):
+        path = self.path_for(url)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    async def exists(self, url):
+        return os.path.exists(self.path_for(url))
+
+    def stats(self):
+        return {"backend": "local", "root": self.root}
+
+
+def create_storage():
+    """Build the video storage from STORAGE_BACKEND (cloudinary or local)"""
+    backend_name = os.environ.get("STORAGE_BACKEND", "cloudinary").lower()
+    folder = os.environ.get("STORAGE_FOLDER", "concept_explanations")
+
+    if backend_name == "cloudinary":
+        storage = CloudinaryStorage(
+            folder,
+            # Cloudinary requires every chunk but the last to be at least 5 MB
+            chunk_size=int(os.environ.get("UPLOAD_CHUNK_SIZE", 6 * 1024 * 1024)),
+            chunk_retries=int(os.environ.get("UPLOAD_CHUNK_RETRIES", "4")),
+            retry_backoff=float(os.environ.get("UPLOAD_RETRY_BACKOFF_SECONDS", "1"))
+        )
+    elif backend_name == "local":
+        storage = LocalStorage(
+            os.environ.get("LOCAL_STORAGE_PATH", os.path.join(os.path.expanduser("~"), "manim_temp", "published")),
+            folder,
+            os.environ.get("LOCAL_STORAGE_URL", "/videos")
+        )
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend_name}")
+
+    logger.info(f"Video storage backend: {backend_name}")
+    return storage
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def load_index(tmp_path, monkeypatch):
+    """Import a fresh index whose stores, caches and workspaces all live under tmp_path.
+
+    Keyword arguments are extra environment variables, read when index is imported.
+    """
+    def load(**env):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.setenv("STORAGE_BACKEND", "local")
+        monkeypatch.setenv("RESULT_CACHE_BACKEND", "memory")
+        monkeypatch.setenv("JOB_DB_PATH", str(tmp_path / "jobs.db"))
+        monkeypatch.setenv("CODE_STORE_PATH", str(tmp_path / "code_store.db"))
+        monkeypatch.setenv("WORKSPACE_MEMORY_ROOT", "")
+        monkeypatch.setenv("WORKSPACE_MIN_FREE_MB", "1")
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        monkeypatch.chdir(tmp_path)
+        sys.modules.pop("index", None)
+        import index
+        return index
+
+    yield load
+    sys.modules.pop("index", None)
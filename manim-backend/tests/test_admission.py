@@ -0,0 +1,56 @@
+"""POST /jobs rejects what the render pool cannot take at submit time, not later in the job."""
+import types
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+
+class StalledModels:
+    """Gemini that never answers, so every job stays in flight until cancelled"""
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.Event().wait()
+
+
+def stalled_client():
+    return types.SimpleNamespace(aio=types.SimpleNamespace(models=StalledModels()))
+
+
+async def submit(index, descriptions):
+    transport = httpx.ASGITransport(app=index.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.post("/jobs", json={"description": d}) for d in descriptions))
+        # Let the accepted jobs reach the render pipeline
+        await asyncio.sleep(0.2)
+        admitted = index.render_pool.admitted
+        tasks = list(index.running_jobs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return responses, admitted
+
+
+def test_burst_beyond_capacity_is_rejected_at_submit(load_index):
+    index = load_index(RENDER_WORKERS=1, RENDER_QUEUE_SIZE=0)
+    index.client = stalled_client()
+
+    responses, admitted = asyncio.run(submit(index, [f"Concept {number}" for number in range(4)]))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [202, 503, 503, 503]
+    assert all(int(response.headers["Retry-After"]) >= 1 for response in responses if response.status_code == 503)
+    assert admitted == 1
+    assert index.render_pool.admitted == 0
+
+
+def test_job_joining_a_running_render_hands_its_ticket_back(load_index):
+    index = load_index(RENDER_WORKERS=1, RENDER_QUEUE_SIZE=1)
+    index.client = stalled_client()
+
+    responses, admitted = asyncio.run(submit(index, ["Same concept", "Same concept"]))
+
+    assert [response.status_code for response in responses] == [202, 202]
+    assert admitted == 1
+    assert index.render_pool.admitted == 0
@@ -0,0 +1,73 @@
+"""Post-render steps finish when their processes do, with no fixed file-stability wait.
+
+The old size-polling check needed at least 3 stable 1-second polls per file and ran
+4 times a request.
+"""
+import os
+import time
+import shutil
+import asyncio
+import subprocess
+
+import pytest
+
+from concurrency import run_command
+
+# Smallest wait the old stability check could finish in: 3 stable 1-second polls
+OLD_STABILITY_FLOOR = 3.0
+
+
+async def mux(index, video_path, audio_path, work_dir, request_id):
+    audio_task = asyncio.get_running_loop().create_future()
+    audio_task.set_result(audio_path)
+    started = time.perf_counter()
+    await index.probe_media(video_path)
+    output_path = await index.add_audio_to_video(video_path, "latency test", request_id, work_dir, audio_task=audio_task)
+    return output_path, time.perf_counter() - started
+
+
+def test_verify_and_mux_pay_no_fixed_wait(load_index, tmp_path):
+    index = load_index()
+    video_path = tmp_path / "ExplainConcept.mp4"
+    audio_path = tmp_path / "narration.wav"
+    video_path.write_bytes(b"video")
+    audio_path.write_bytes(b"audio")
+
+    async def fake_run_command(command, cwd=None, timeout=None, on_output=None, preexec_fn=None):
+        # The mux command ends with its output path
+        with open(command[-1], "wb") as f:
+            f.write(b"muxed")
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+    async def fake_probe_media(path):
+        return {"duration": 5.0, "size": os.path.getsize(path), "video": {}, "audio": {}, "frame_count": 75}
+
+    index.run_command = fake_run_command
+    index.probe_media = fake_probe_media
+
+    output_path, elapsed = asyncio.run(mux(index, str(video_path), str(audio_path), str(tmp_path), "stubbed"))
+
+    assert os.path.exists(output_path)
+    assert elapsed < OLD_STABILITY_FLOOR / 10
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_real_verify_and_mux_stay_below_the_old_floor(load_index, tmp_path):
+    index = load_index()
+    video_path = str(tmp_path / "ExplainConcept.mp4")
+    audio_path = str(tmp_path / "narration.wav")
+
+    async def scenario():
+        for command in [
+            ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=5:size=320x240:rate=15",
+             "-pix_fmt", "yuv420p", "-y", video_path],
+            ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=4", "-y", audio_path]
+        ]:
+            result = await run_command(command)
+            assert result.returncode == 0, result.stderr
+        return await mux(index, video_path, audio_path, str(tmp_path), "real")
+
+    output_path, elapsed = asyncio.run(scenario())
+
+    assert os.path.exists(output_path)
+    assert elapsed < OLD_STABILITY_FLOOR
@@ -0,0 +1,86 @@
+"""/health must keep answering while a render is in flight on the same event loop.
+
+The render goes through the real render_script and run_command; only the manim
+executable is replaced, by a child process that sleeps instead of rendering.
+"""
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+SCRIPT = """from manim import *
+class ExplainConcept(Scene):
+    def construct(self):
+        self.play(Create(Circle()))
+"""
+# A blocked loop would hold /health for the whole 30 second render
+HEALTH_BOUND = 1.0
+RENDER_SECONDS = 30
+
+FAKE_MANIM = """#!{python}
+import os, sys, time
+if "--version" in sys.argv:
+    print("Manim Community v0.19.0")
+    sys.exit(0)
+# Record when the render started, then take far longer than any bound
+with open({marker!r} + ".tmp", "w") as f:
+    f.write(str(time.time()))
+os.replace({marker!r} + ".tmp", {marker!r})
+time.sleep({seconds})
+"""
+
+
+class FakeModels:
+    async def generate_content(self, model, contents, config=None):
+        return types.SimpleNamespace(text=json.dumps({
+            "python_code": SCRIPT, "explanation": "A circle is drawn.", "narration": "", "sections": []
+        }))
+
+
+@pytest.fixture
+def render_started_marker(tmp_path, monkeypatch):
+    """Put a slow fake manim first on PATH; it writes the returned file when a render starts"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    marker = tmp_path / "render_started"
+    manim = bin_dir / "manim"
+    manim.write_text(FAKE_MANIM.format(python=sys.executable, marker=str(marker), seconds=RENDER_SECONDS))
+    manim.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return marker
+
+
+def test_health_answers_while_rendering(load_index, render_started_marker):
+    index = load_index()
+    index.client = types.SimpleNamespace(aio=types.SimpleNamespace(models=FakeModels()))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=index.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            render = asyncio.create_task(client.post("/explain-concept", json={"description": "Draw a circle"}))
+            try:
+                deadline = time.monotonic() + 20
+                while not render_started_marker.exists():
+                    assert not render.done(), render.result().text
+                    assert time.monotonic() < deadline, "render never started"
+                    await asyncio.sleep(0.05)
+                render_started = float(render_started_marker.read_text())
+                response = await client.get("/health")
+                # Measured from the render's start, so a loop blocked by the render cannot hide
+                elapsed = time.time() - render_started
+                assert not render.done()
+            finally:
+                render.cancel()
+                await asyncio.gather(render, return_exceptions=True)
+        return response, elapsed
+
+    response, elapsed = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert elapsed < HEALTH_BOUND
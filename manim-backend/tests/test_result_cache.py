@@ -0,0 +1,40 @@
+"""Each request counts once in the result cache's hit/miss stats."""
+import asyncio
+
+
+def stub_render(index):
+    renders = []
+
+    async def admit_and_render(request, request_id, key, tier, channel, ticket=None):
+        renders.append(tier)
+        index.result_cache.set(key, f"/videos/{tier}.mp4", "explanation")
+        return {"video_url": f"/videos/{tier}.mp4", "explanation": "explanation", "attempts": 1, "cached": False}
+
+    index.admit_and_render = admit_and_render
+    return renders
+
+
+def test_uncached_request_counts_one_miss(load_index):
+    index = load_index()
+    renders = stub_render(index)
+    request = index.ConceptRequest(description="Draw a circle")
+
+    asyncio.run(index.generate_concept_video(request))
+    assert index.result_cache.stats()["misses"] == 1
+
+    result = asyncio.run(index.generate_concept_video(request))
+    assert result["cached"]
+    assert renders == ["medium"]
+    assert index.result_cache.stats()["hits"] == 1
+    assert index.result_cache.stats()["misses"] == 1
+
+
+def test_degraded_request_also_looks_up_its_tier(load_index):
+    index = load_index()
+    renders = stub_render(index)
+    request = index.ConceptRequest(description="Draw a square", quality="high")
+    index.quality_policy.choose = lambda requested, backlog: "low"
+
+    asyncio.run(index.generate_concept_video(request))
+    assert renders == ["low"]
+    assert index.result_cache.stats()["misses"] == 2
@@ -0,0 +1,98 @@
+"""Static validation of generated scripts, over the benchmark corpus and check by check."""
+import os
+import glob
+import json
+
+import pytest
+
+import validator
+from validator import validate_manim_code, load_manim_namespace, CodeValidationError
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "corpus")
+CORPUS = sorted(glob.glob(os.path.join(CORPUS_DIR, "*.json")))
+
+SCENE = """from manim import *
+
+class ExplainConcept(Scene):
+    def construct(self):
+{body}
+"""
+
+
+def scene(*lines):
+    return SCENE.format(body="\n".join(f"        {line}" for line in lines))
+
+
+def errors_of(python_code):
+    with pytest.raises(CodeValidationError) as raised:
+        validate_manim_code(python_code)
+    return raised.value.errors
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=os.path.basename)
+def test_corpus_verdict_matches_expected(path):
+    with open(path) as f:
+        entry = json.load(f)
+    # Without manim the unknown-symbol check is off, so these entries cannot be judged
+    if entry.get("requires_manim") and not load_manim_namespace():
+        pytest.skip("manim is not importable")
+    if entry["expected_valid"]:
+        validate_manim_code(entry["python_code"])
+    else:
+        errors_of(entry["python_code"])
+
+
+def test_valid_scene_passes():
+    validate_manim_code(scene("circle = Circle()", "self.play(Create(circle))"))
+
+
+def test_non_ascii_lines_are_reported():
+    errors = errors_of(scene("label = Text('π r²')", "self.add(label)"))
+    assert errors == ["Line 5: non-ASCII characters are not allowed"]
+
+
+def test_syntax_error_is_reported():
+    errors = errors_of(scene("self.play(Create(Circle())"))
+    assert len(errors) == 1 and "syntax error" in errors[0]
+
+
+@pytest.mark.parametrize("python_code, error", [
+    ("from manim import *\n\nclass Explain(Scene):\n    def construct(self):\n        pass\n",
+     "No ExplainConcept(Scene) class defined"),
+    ("from manim import *\n\nclass ExplainConcept:\n    def construct(self):\n        pass\n",
+     "ExplainConcept must inherit from Scene"),
+    ("from manim import *\n\nclass ExplainConcept(MovingCameraScene):\n    pass\n",
+     "ExplainConcept has no construct() method"),
+])
+def test_scene_class_problems_are_reported(python_code, error):
+    assert error in errors_of(python_code)
+
+
+@pytest.mark.parametrize("line, error", [
+    ("logo = SVGMobject('logo')", "Line 5: SVGMobject() loads an external file"),
+    ("photo = ImageMobject(name)", "Line 5: ImageMobject() loads an external file"),
+    ("data = open('points')", "Line 5: open() loads an external file"),
+    ("label = Text('diagram.png')", "Line 5: reference to external file 'diagram.png'"),
+])
+def test_file_references_are_reported(line, error):
+    assert error in errors_of(scene(line))
+
+
+def test_file_extensions_inside_text_are_allowed():
+    validate_manim_code(scene("label = Text('Save it as .png files later')", "self.add(label)"))
+
+
+def test_unknown_symbols_are_reported_once(monkeypatch):
+    monkeypatch.setattr(validator, "_manim_namespace", {"Scene", "Circle", "Create", "Vector", "YELLOW"})
+    errors = errors_of(scene(
+        "radius = 2",
+        "arrow = Vector2D([radius, 1], color=YELLOW)",
+        "self.play(Create(Circle(radius=radius)), GrowArrow(arrow), GrowArrow(arrow))"
+    ))
+    assert errors == ["Line 6: unknown symbol 'Vector2D'", "Line 7: unknown symbol 'GrowArrow'"]
+
+
+def test_unknown_symbols_skipped_for_foreign_star_imports(monkeypatch):
+    monkeypatch.setattr(validator, "_manim_namespace", {"Scene"})
+    python_code = "from numpy import *\n" + scene("self.add(Circle())", "values = linspace(0, 1)")
+    validate_manim_code(python_code)
@@ -0,0 +1,206 @@
+import os
+import shutil
+import hashlib
+import asyncio
+import logging
+import traceback
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def _pick_voice(engine):
+    """Prefer a female voice, else the first one installed; returns the voice id or None"""
+    voices = engine.getProperty('voices')
+    if not voices:
+        return None
+    for voice in voices:
+        if 'female' in voice.name.lower() or 'woman' in voice.name.lower():
+            return voice.id
+    return voices[0].id
+
+
+def _worker_main(conn, rate, volume):
+    """Entry point of the TTS worker: set up one engine, then synthesize clips until told to stop"""
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    engine.setProperty('rate', rate)
+    engine.setProperty('volume', volume)
+    voice_id = _pick_voice(engine)
+    if voice_id:
+        engine.setProperty('voice', voice_id)
+
+    conn.send(("ready", os.getpid(), voice_id))
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        text, audio_path = job
+        try:
+            engine.save_to_file(text, audio_path)
+            engine.runAndWait()
+            status, payload = "ok", audio_path
+        except BaseException:
+            status, payload = "error", traceback.format_exc()
+        conn.send((status, payload))
+
+
+class TTSWorker:
+    def __init__(self, context, rate, volume):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, rate, volume), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.voice_id = None
+
+    def wait_ready(self, timeout):
+        # Polling first keeps a worker stuck in engine setup from blocking the caller forever
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"TTS worker not ready after {timeout:.0f}s")
+        status, pid, self.voice_id = self.conn.recv()
+        logger.info(f"TTS worker {pid} ready with voice {self.voice_id}")
+
+    def run(self, text, audio_path, timeout):
+        self.conn.send((text, audio_path))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"TTS synthesis took longer than {timeout:.0f}s")
+        return self.conn.recv()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class TTSService:
+    """A long-lived pyttsx3 worker process plus an on-disk cache of synthesized clips.
+
+    Clips are cached by (text, voice, rate) and evicted least recently used once the
+    cache grows past max_cache_bytes.
+    """
+
+    def __init__(self, cache_dir, max_cache_bytes, rate=140, volume=0.9, timeout=60):
+        self.cache_dir = cache_dir
+        self.max_cache_bytes = max_cache_bytes
+        self.rate = rate
+        self.volume = volume
+        # Seconds one clip (or worker startup) may take before the worker is killed and replaced
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        # One engine, one thread: pyttsx3 is not thread-safe and the worker handles one clip at a time
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+        self._lock = asyncio.Lock()
+        self._worker = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.restarts = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _spawn(self):
+        worker = TTSWorker(self._context, self.rate, self.volume)
+        try:
+            worker.wait_ready(self.timeout)
+        except (EOFError, OSError, TimeoutError) as e:
+            worker.kill()
+            raise Exception(f"TTS worker failed to start: {e!r}")
+        return worker
+
+    async def start(self):
+        """Start the worker if it is not running; synthesize() calls this too, so a failed start is retried"""
+        if self._worker is None:
+            loop = asyncio.get_running_loop()
+            self._worker = await loop.run_in_executor(self._executor, self._spawn)
+
+    def _cache_path(self, text, voice_id):
+        digest = hashlib.sha256(f"{voice_id}\0{self.rate}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    async def synthesize(self, text, audio_path):
+        """Write the spoken text to audio_path as WAV, from the cache when it was spoken before"""
+        async with self._lock:
+            await self.start()
+            cache_path = self._cache_path(text, self._worker.voice_id)
+            if os.path.exists(cache_path):
+                self.hits += 1
+                os.utime(cache_path)
+                shutil.copyfile(cache_path, audio_path)
+                return audio_path
+
+            self.misses += 1
+            loop = asyncio.get_running_loop()
+            try:
+                status, payload = await loop.run_in_executor(
+                    self._executor, self._worker.run, text, audio_path, self.timeout
+                )
+            except (EOFError, OSError, TimeoutError) as e:
+                # Kill a hung engine too, so one stuck clip does not block every later render
+                logger.error(f"TTS worker died or hung: {e!r}")
+                self._worker.kill()
+                self._worker = None
+                self.restarts += 1
+                raise Exception(f"TTS worker failed during synthesis: {e!r}")
+            if status != "ok":
+                raise Exception(f"TTS synthesis failed: {payload}")
+
+            if os.path.exists(audio_path) and os.path.getsize(audio_path) > 0:
+                partial_path = f"{cache_path}.{os.getpid()}.part"
+                shutil.copyfile(audio_path, partial_path)
+                os.replace(partial_path, cache_path)
+                self._evict()
+            return audio_path
+
+    def _cache_entries(self):
+        return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".wav")]
+
+    def _evict(self):
+        entries = self._cache_entries()
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            if total <= self.max_cache_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+            self.evictions += 1
+
+    async def close(self):
+        if self._worker:
+            self._worker.stop()
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        entries = self._cache_entries()
+        return {
+            "voice": self._worker.voice_id if self._worker else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "restarts": self.restarts,
+            "entries": len(entries),
+            "bytes": sum(entry.stat().st_size for entry in entries)
+        }
+
+
+def create_tts_service():
+    return TTSService(
+        cache_dir=os.environ.get(
+            "TTS_CACHE_DIR",
+            os.path.join(os.path.expanduser("~"), "manim_temp", "tts_cache")
+        ),
+        max_cache_bytes=int(float(os.environ.get("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024),
+        rate=int(os.environ.get("TTS_RATE", "140")),
+        volume=float(os.environ.get("TTS_VOLUME", "0.9")),
+        timeout=float(os.environ.get("TTS_TIMEOUT_SECONDS", "60"))
+    )
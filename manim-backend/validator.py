@@ -0,0 +1,133 @@
+import re
+import ast
+import builtins
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Mobjects and calls that load external files, which generated code must never use
+FILE_LOADING_CALLS = {"SVGMobject", "ImageMobject", "open"}
+FILE_REFERENCE_PATTERN = re.compile(r"\.(svg|png|jpe?g|gif|bmp|webp|mp4|mov|mp3|wav|ttf|otf|txt|csv|json)$", re.IGNORECASE)
+
+_manim_namespace = None
+
+# Counts of validated scripts, reported on /stats
+validation_stats = {"passed": 0, "rejected": 0}
+
+
+class CodeValidationError(Exception):
+    """Generated Manim code failed static validation"""
+
+    def __init__(self, errors):
+        super().__init__("Code validation failed: " + "; ".join(errors))
+        self.errors = errors
+
+
+def load_manim_namespace():
+    """Import manim once and cache the names `from manim import *` provides"""
+    global _manim_namespace
+    if _manim_namespace is None:
+        try:
+            import manim
+            _manim_namespace = set(getattr(manim, "__all__", None) or dir(manim))
+            logger.info(f"Loaded manim namespace: {len(_manim_namespace)} symbols")
+        except Exception as e:
+            logger.warning(f"Could not import manim, unknown-symbol checks disabled: {e}")
+            _manim_namespace = set()
+    return _manim_namespace
+
+
+def _bound_names(tree):
+    """Every name the script binds anywhere, so local variables are never reported as unknown"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != "*":
+                    names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, ast.MatchAs) and node.name:
+            names.add(node.name)
+    return names
+
+
+def _check_scene_class(tree, errors):
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "ExplainConcept":
+            base_names = [base.id if isinstance(base, ast.Name) else getattr(base, "attr", "") for base in node.bases]
+            if not any(name.endswith("Scene") for name in base_names):
+                errors.append("ExplainConcept must inherit from Scene")
+            if not any(isinstance(item, ast.FunctionDef) and item.name == "construct" for item in node.body):
+                errors.append("ExplainConcept has no construct() method")
+            return
+    errors.append("No ExplainConcept(Scene) class defined")
+
+
+def _check_file_references(tree, errors):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            func_name = node.func.id if isinstance(node.func, ast.Name) else getattr(node.func, "attr", None)
+            if func_name in FILE_LOADING_CALLS:
+                errors.append(f"Line {node.lineno}: {func_name}() loads an external file")
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if FILE_REFERENCE_PATTERN.search(node.value.strip()):
+                errors.append(f"Line {node.lineno}: reference to external file '{node.value.strip()}'")
+
+
+def _check_unknown_symbols(tree, errors):
+    star_modules = [
+        node.module for node in ast.walk(tree)
+        if isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names)
+    ]
+    # A star import from anything but manim makes the available names unknowable
+    if any(module != "manim" for module in star_modules):
+        return
+
+    manim_names = load_manim_namespace() if star_modules else set()
+    if star_modules and not manim_names:
+        return
+
+    known = _bound_names(tree) | set(dir(builtins)) | manim_names
+    reported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in known:
+            if node.id not in reported:
+                reported.add(node.id)
+                errors.append(f"Line {node.lineno}: unknown symbol '{node.id}'")
+
+
+def validate_manim_code(python_code):
+    """Statically check generated Manim code before spending a render on it.
+
+    Raises CodeValidationError listing every problem found.
+    """
+    errors = []
+
+    for lineno, line in enumerate(python_code.splitlines(), start=1):
+        if not line.isascii():
+            errors.append(f"Line {lineno}: non-ASCII characters are not allowed")
+
+    try:
+        tree = ast.parse(python_code)
+    except SyntaxError as e:
+        errors.append(f"Line {e.lineno}: syntax error: {e.msg}")
+        tree = None
+
+    if tree is not None:
+        _check_scene_class(tree, errors)
+        _check_file_references(tree, errors)
+        _check_unknown_symbols(tree, errors)
+
+    if errors:
+        validation_stats["rejected"] += 1
+        raise CodeValidationError(errors)
+    validation_stats["passed"] += 1
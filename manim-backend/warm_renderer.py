@@ -0,0 +1,213 @@
+import os
+import uuid
+import asyncio
+import logging
+import resource
+import subprocess
+import traceback
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# manim CLI quality flags and the matching config presets
+QUALITY_PRESETS = {
+    "-ql": "low_quality",
+    "-qm": "medium_quality",
+    "-qh": "high_quality",
+    "-qp": "production_quality",
+    "-qk": "fourk_quality"
+}
+
+
+def _render_script(job):
+    """Render one script inside a warm worker, isolated in a fresh module and config"""
+    import importlib.util
+    from manim import tempconfig
+
+    os.chdir(job["cwd"])
+    script_path = job["script_path"]
+    module_name = os.path.splitext(os.path.basename(script_path))[0]
+    options = {
+        "media_dir": job["media_dir"],
+        "quality": QUALITY_PRESETS[job["quality"]],
+        # input_file drives the {module_name} part of the output path, same layout as the CLI
+        "input_file": script_path,
+        "progress_bar": "none",
+        "verbosity": "WARNING"
+    }
+    options.update(job.get("config") or {})
+    with tempconfig(options):
+        spec = importlib.util.spec_from_file_location(f"{module_name}_{uuid.uuid4().hex}", script_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        scene = getattr(module, job["scene_name"])()
+        scene.render()
+        return str(scene.renderer.file_writer.movie_file_path)
+
+
+def _apply_job_limits(limits):
+    """Cap one job inside a long-lived worker via soft rlimits.
+
+    CPU time is counted from what the worker has already used, so earlier jobs do not
+    eat into this job's budget.
+    """
+    if limits.get("cpu_seconds"):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(usage.ru_utime + usage.ru_stime) + int(limits["cpu_seconds"])
+        resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+    for limit, key in ((resource.RLIMIT_AS, "address_space_mb"), (resource.RLIMIT_FSIZE, "file_size_mb")):
+        if limits.get(key):
+            _, hard = resource.getrlimit(limit)
+            soft = int(limits[key] * 1024 * 1024)
+            resource.setrlimit(limit, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+
+
+def _worker_main(conn):
+    """Entry point of a warm worker: import manim once, then render jobs until told to stop"""
+    import manim  # noqa: F401 - the whole point is paying this import once
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        try:
+            _apply_job_limits(job.get("limits") or {})
+            video_path = _render_script(job)
+            status, payload = "ok", video_path
+        except BaseException:
+            status, payload = "error", traceback.format_exc()
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        conn.send((status, payload, max_rss_mb))
+
+
+class WarmWorker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+        self.max_rss_mb = 0
+
+    def wait_ready(self):
+        status, pid = self.conn.recv()
+        logger.info(f"Warm Manim worker {pid} ready")
+
+    def run(self, job):
+        self.conn.send(job)
+        return self.conn.recv()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class WarmRenderer:
+    """Pool of long-lived processes that have manim imported and render scripts on demand.
+
+    Workers are recycled after max_jobs renders or once their peak RSS passes max_rss_mb.
+    """
+
+    def __init__(self, size, max_jobs, max_rss_mb):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self._context = multiprocessing.get_context("spawn")
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="warm-render")
+        self._idle = asyncio.Queue()
+        self.recycled = 0
+
+    def _spawn(self):
+        worker = WarmWorker(self._context)
+        worker.wait_ready()
+        return worker
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        workers = await asyncio.gather(*[loop.run_in_executor(self._executor, self._spawn) for _ in range(self.size)])
+        for worker in workers:
+            self._idle.put_nowait(worker)
+        logger.info(f"Warm renderer started with {self.size} workers")
+
+    async def _replace(self, worker):
+        worker.stop()
+        self.recycled += 1
+        loop = asyncio.get_running_loop()
+        self._idle.put_nowait(await loop.run_in_executor(self._executor, self._spawn))
+
+    async def render(self, script_path, media_dir, quality, cwd, scene_name="ExplainConcept", config=None,
+                     timeout=None, limits=None):
+        """Render a script on a warm worker; returns a CompletedProcess like the manim CLI call.
+
+        A render that runs past timeout, or is cancelled, kills its worker; a fresh one replaces it.
+        """
+        job = {
+            "script_path": script_path,
+            "media_dir": media_dir,
+            "quality": quality,
+            "cwd": cwd,
+            "scene_name": scene_name,
+            "config": config,
+            "limits": limits
+        }
+        worker = await self._idle.get()
+        loop = asyncio.get_running_loop()
+        try:
+            status, payload, max_rss_mb = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, worker.run, job), timeout
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            worker.process.kill()
+            loop.create_task(self._replace(worker))
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.error(f"Warm render timed out after {timeout}s")
+            return subprocess.CompletedProcess(job, 1, "", f"Render timed out after {timeout:.0f}s")
+        except (EOFError, OSError) as e:
+            # The worker died mid-render (crash or OOM kill) - replace it and report the failure
+            logger.error(f"Warm worker died during render: {e}")
+            await self._replace(worker)
+            return subprocess.CompletedProcess(job, 1, "", f"Warm worker died during render: {e}")
+
+        worker.jobs_done += 1
+        worker.max_rss_mb = max_rss_mb
+        if worker.jobs_done >= self.max_jobs or max_rss_mb >= self.max_rss_mb:
+            logger.info(f"Recycling warm worker after {worker.jobs_done} jobs ({max_rss_mb:.0f} MB peak RSS)")
+            asyncio.create_task(self._replace(worker))
+        else:
+            self._idle.put_nowait(worker)
+
+        if status == "ok":
+            return subprocess.CompletedProcess(job, 0, f"File ready at {payload}", "")
+        return subprocess.CompletedProcess(job, 1, "", payload)
+
+    async def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().stop()
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        return {
+            "workers": self.size,
+            "idle": self._idle.qsize(),
+            "recycled": self.recycled
+        }
+
+
+def create_warm_renderer(default_size):
+    """Build the warm renderer when RENDER_BACKEND=warm, otherwise return None (manim CLI)"""
+    if os.environ.get("RENDER_BACKEND", "cli").lower() != "warm":
+        return None
+    return WarmRenderer(
+        size=int(os.environ.get("WARM_WORKERS", default_size)),
+        max_jobs=int(os.environ.get("WARM_WORKER_MAX_JOBS", "20")),
+        max_rss_mb=float(os.environ.get("WARM_WORKER_MAX_RSS_MB", "1500"))
+    )
@@ -0,0 +1,195 @@
+import os
+import time
+import shutil
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+def directory_size(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def free_bytes(path):
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class WorkspaceManager:
+    """Gives every render its own scratch directory and removes it when the render ends.
+
+    Workspaces go on a RAM-backed tmpfs (memory_root) while it has room for them, and on
+    disk_root otherwise. Directory names start with the owning process id, so the sweeper
+    can tell a crashed process's leftovers from another worker's live renders.
+    """
+
+    def __init__(self, memory_root, disk_root, memory_max_bytes, min_free_bytes, max_age):
+        self.memory_root = memory_root
+        self.disk_root = disk_root
+        self.memory_max_bytes = memory_max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.max_age = max_age
+        self._active = {}
+        self._targets = []
+        self.created = {"memory": 0, "disk": 0}
+        self.swept = 0
+        self.swept_bytes = 0
+        os.makedirs(disk_root, exist_ok=True)
+        if memory_root:
+            try:
+                os.makedirs(memory_root, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"tmpfs workspace root unavailable, using disk only: {e}")
+                self.memory_root = None
+
+    def add_sweep_target(self, directory, max_age, max_bytes):
+        """Also expire entries of directory: anything older than max_age, then oldest first down to max_bytes"""
+        self._targets.append({"directory": directory, "max_age": max_age, "max_bytes": max_bytes})
+
+    def _memory_has_room(self):
+        if not self.memory_root:
+            return False
+        try:
+            if free_bytes(self.memory_root) < self.min_free_bytes:
+                return False
+        except OSError:
+            return False
+        used = sum(directory_size(path) for path in self._active if path.startswith(self.memory_root))
+        return used < self.memory_max_bytes
+
+    def create(self, request_id):
+        tier = "memory" if self._memory_has_room() else "disk"
+        root = self.memory_root if tier == "memory" else self.disk_root
+        path = os.path.join(root, f"{os.getpid()}-{request_id}")
+        self._active[path] = time.time()
+        os.makedirs(path, exist_ok=True)
+        self.created[tier] += 1
+        logger.info(f"Workspace for {request_id} on {tier}: {path}")
+        return path
+
+    def release(self, path):
+        self._active.pop(path, None)
+        shutil.rmtree(path, ignore_errors=True)
+
+    @asynccontextmanager
+    async def workspace(self, request_id):
+        """Hold a workspace for one render; everything in it is removed afterwards, even on failure"""
+        path = self.create(request_id)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def _remove(self, path):
+        size = directory_size(path) if os.path.isdir(path) else os.lstat(path).st_size
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+        self.swept += 1
+        self.swept_bytes += size
+        logger.info(f"Swept {path} ({size} bytes)")
+
+    def _is_orphan(self, path, now):
+        if path in self._active:
+            return False
+        owner = os.path.basename(path).split("-", 1)[0]
+        if not owner.isdigit():
+            return True
+        owner = int(owner)
+        if owner == os.getpid() or not _pid_alive(owner):
+            return True
+        # Another live worker owns it; only reclaim it once it is far past any render timeout
+        return now - os.path.getmtime(path) > self.max_age
+
+    def _sweep_target(self, directory, max_age, max_bytes, now):
+        if not os.path.isdir(directory):
+            return
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                entries.append([os.path.getmtime(path), path, directory_size(path) if os.path.isdir(path) else os.path.getsize(path)])
+            except OSError:
+                continue
+        entries.sort()
+        total = sum(entry[2] for entry in entries)
+        for modified, path, size in entries:
+            if now - modified <= max_age and total <= max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def sweep(self):
+        """Remove orphaned workspaces and expire sweep targets; runs in a worker thread"""
+        now = time.time()
+        for root in (self.memory_root, self.disk_root):
+            if not root or not os.path.isdir(root):
+                continue
+            for name in os.listdir(root):
+                path = os.path.join(root, name)
+                try:
+                    if self._is_orphan(path, now):
+                        self._remove(path)
+                except OSError as e:
+                    logger.warning(f"Could not sweep {path}: {e}")
+        for target in self._targets:
+            try:
+                self._sweep_target(target["directory"], target["max_age"], target["max_bytes"], now)
+            except OSError as e:
+                logger.warning(f"Could not sweep {target['directory']}: {e}")
+
+    async def run_sweeper(self, interval):
+        while True:
+            try:
+                await run_blocking(self.sweep)
+            except Exception as e:
+                logger.error(f"Workspace sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self):
+        usage = {}
+        for tier, root in (("memory", self.memory_root), ("disk", self.disk_root)):
+            if root and os.path.isdir(root):
+                usage[tier] = {"root": root, "bytes": directory_size(root), "free_bytes": free_bytes(root)}
+        return {
+            "active": len(self._active),
+            "created": dict(self.created),
+            "swept": self.swept,
+            "swept_bytes": self.swept_bytes,
+            "usage": usage
+        }
+
+
+def create_workspace_manager():
+    """Build the workspace manager from WORKSPACE_* settings"""
+    temp_base_dir = os.path.join(os.path.expanduser("~"), "manim_temp")
+    # /dev/shm is tmpfs on Linux; Docker's default is only 64 MB, so the free-space check usually sends renders to disk there
+    default_memory_root = "/dev/shm/manim_workspaces" if os.path.isdir("/dev/shm") else ""
+    return WorkspaceManager(
+        memory_root=os.environ.get("WORKSPACE_MEMORY_ROOT", default_memory_root) or None,
+        disk_root=os.environ.get("WORKSPACE_DISK_ROOT", os.path.join(temp_base_dir, "workspaces")),
+        memory_max_bytes=int(os.environ.get("WORKSPACE_MEMORY_MAX_MB", "2048")) * 1024 * 1024,
+        min_free_bytes=int(os.environ.get("WORKSPACE_MIN_FREE_MB", "512")) * 1024 * 1024,
+        max_age=float(os.environ.get("WORKSPACE_MAX_AGE_SECONDS", "3600"))
+    )